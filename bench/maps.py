@@ -0,0 +1,143 @@
+#! /usr/bin/env python
+
+"""Seeded procedural maps for planner benchmarks.
+
+Every generator returns a square uint8 grid (0 -> empty, 1 -> wall) surrounded
+by walls, like map1.csv.
+"""
+
+import numpy as np
+
+from tools.oracle import distance_field
+from tools.utils import EMPTY, WALL
+
+__author__ = "Pedro Arias Perez"
+
+
+def bordered(n):
+    """
+    Empty n x n grid surrounded by walls.
+    """
+    grid = np.zeros((n, n), dtype=np.uint8)
+    grid[0, :] = grid[-1, :] = grid[:, 0] = grid[:, -1] = WALL
+    return grid
+
+
+def open_rooms(n, seed=0, room=16):
+    """
+    Rooms of about room x room cells, each wall between rooms with one door.
+    """
+    rng = np.random.default_rng(seed)
+    grid = bordered(n)
+    for k in range(room, n - 1, room):
+        grid[k, :] = WALL
+        grid[:, k] = WALL
+    bounds = list(range(0, n - 1, room)) + [n - 1]
+    for a, b in zip(bounds, bounds[1:]):
+        if b - a < 2:
+            continue
+        for k in bounds[1:-1]:  # one door per wall segment
+            door = rng.integers(a + 1, b)
+            grid[k, door] = EMPTY
+            grid[door, k] = EMPTY
+    return grid
+
+
+def maze(n, seed=0):
+    """
+    Perfect maze (randomized depth first search) on the odd cells.
+    """
+    rng = np.random.default_rng(seed)
+    grid = np.ones((n, n), dtype=np.uint8)
+    cells = (n - 1) // 2  # maze cells per side
+    if cells < 1:
+        return bordered(n)
+    visited = np.zeros((cells, cells), dtype=bool)
+    stack = [(0, 0)]
+    visited[0, 0] = True
+    grid[1, 1] = EMPTY
+    steps = ((-1, 0), (1, 0), (0, 1), (0, -1))
+    while stack:
+        x, y = stack[-1]
+        options = [(x + dx, y + dy) for dx, dy in steps
+                   if 0 <= x + dx < cells and 0 <= y + dy < cells and not visited[x + dx, y + dy]]
+        if not options:
+            stack.pop()
+            continue
+        nx, ny = options[rng.integers(len(options))]
+        visited[nx, ny] = True
+        grid[2 * nx + 1, 2 * ny + 1] = EMPTY
+        grid[x + nx + 1, y + ny + 1] = EMPTY  # wall between both cells
+        stack.append((nx, ny))
+    return grid
+
+
+def random_obstacles(n, seed=0, density=0.25):
+    """
+    Walls placed uniformly at random with the given density.
+    """
+    rng = np.random.default_rng(seed)
+    grid = bordered(n)
+    grid[1:-1, 1:-1] = rng.random((n - 2, n - 2)) < density
+    return grid
+
+
+def corridors(n, seed=0, width=1):
+    """
+    Serpentine: horizontal corridors joined alternately at the left and right ends.
+    """
+    grid = np.ones((n, n), dtype=np.uint8)
+    rows = list(range(1, n - 1, width + 1))
+    for i, row in enumerate(rows):
+        grid[row:row + width, 1:-1] = EMPTY
+        if i + 1 < len(rows):
+            col = n - 2 if i % 2 == 0 else 1
+            grid[row:rows[i + 1], col] = EMPTY
+    grid[-1, :] = WALL
+    return grid
+
+
+GENERATORS = {
+    "rooms": open_rooms,
+    "maze": maze,
+    "random": random_obstacles,
+    "corridors": corridors,
+}
+
+
+def endpoints(grid):
+    """
+    Start at the free cell nearest to the top-left corner and end at the cell
+    reachable from it nearest to the bottom-right corner.
+
+    grid: cell codes (np.ndarray)
+
+    return: start ([int, int]), end ([int, int]), None if no other cell is reachable
+    """
+    n = grid.shape[0]
+    xs, ys = np.nonzero(grid != WALL)
+    if len(xs) == 0:
+        return None, None
+    first = np.argmin(xs + ys)
+    start = [int(xs[first]), int(ys[first])]
+    distances = distance_field(grid, [start])
+    xs, ys = np.nonzero(distances > 0)
+    if len(xs) == 0:
+        return start, None
+    last = np.argmin((n - 1 - xs) + (n - 1 - ys))
+    return start, [int(xs[last]), int(ys[last])]
+
+
+def generate(kind, n, seed=0):
+    """
+    Generates a benchmark map.
+
+    kind: one of GENERATORS (str)
+    n: map side (int)
+    seed: random seed (int)
+
+    return: grid (np.ndarray of uint8), start ([int, int]), end ([int, int])
+    """
+    grid = GENERATORS[kind](n, seed=seed)
+    start, end = endpoints(grid)
+    return grid, start, end
@@ -0,0 +1,188 @@
+#! /usr/bin/env python
+
+"""Planner benchmark suite.
+
+Runs the planners quietly (no observer) on seeded procedural maps and reports
+wall time, cells checked, nodes expanded (cost-based planners), peak memory
+and route length as JSON and/or CSV so that results can be compared between
+versions. Try: python3 -m bench.run -h
+"""
+
+import sys
+import csv
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tracemalloc
+
+import numpy as np
+
+from bench.maps import GENERATORS, generate
+from tools import astar, dijkstra, bfs, dfs, bidirectional, jps, oracle, hpa, ara
+from tools.utils import CharMap, get_route
+
+__author__ = "Pedro Arias Perez"
+
+
+SIZES = [10, 64, 256, 1024, 4096]  # all the scales, pass the wanted ones with -n
+DEFAULT_SIZES = [10, 64, 256]
+FIELDS = ["kind", "size", "seed", "alg", "repeat", "time_s", "time_min_s", "n_checked",
+          "n_expanded", "peak_bytes", "route_length", "found"]
+
+
+def run_tree_search(search, map):
+    """
+    Runs a planner which returns the goal parent id and rebuilds the route.
+
+    return: route length in steps (int), None if not found
+    """
+    goalParentId = search(map)
+    if goalParentId == -1:
+        return None
+    return len(get_route(map, goalParentId))
+
+
+def run_route_search(search, map):
+    """
+    Runs a planner which returns the route.
+
+    return: route length in steps (int), None if not found
+    """
+    route = search(map)
+    return len(route) - 1 if route else None
+
+
+def run_oracle(map):
+    """
+    Builds the goal distance field and answers the route.
+
+    return: route length in steps (int), None if not found
+    """
+    route = oracle.RouteOracle(map.grid, map.end).route(map.start)
+    return len(route) - 1 if route else None
+
+
+# name -> (map class, runner)
+ENGINES = {
+    "bfs": (CharMap, lambda map: run_tree_search(bfs.bfs, map)),
+    "dfs": (CharMap, lambda map: run_tree_search(dfs.dfs, map)),
+    "dijkstra": (dijkstra.CharMapCost, lambda map: run_tree_search(dijkstra.dijkstra, map)),
+    "astar": (astar.CharMapCost, lambda map: run_tree_search(astar.astar, map)),
+    "bibfs": (CharMap, lambda map: run_route_search(bidirectional.bibfs, map)),
+    "biastar": (CharMap, lambda map: run_route_search(bidirectional.biastar, map)),
+    "jps": (CharMap, lambda map: run_route_search(jps.jps, map)),
+    "oracle": (CharMap, run_oracle),
+    "hpa": (CharMap, lambda map: run_route_search(hpa.hpa, map)),
+    "ara": (CharMap, lambda map: run_route_search(lambda m: ara.ara(m)[0], map)),  # no time budget: optimal route
+}
+
+
+def measure(alg, grid, start, end, repeat):
+    """
+    Benchmarks a planner on a map: repeat timed runs, then one more run
+    under tracemalloc for the peak memory.
+
+    return: record with the measures (dict)
+    """
+    map_class, runner = ENGINES[alg]
+    times = []
+    for _ in range(repeat):
+        map = map_class(None, start, end, grid=grid)
+        t0 = time.perf_counter()
+        length = runner(map)
+        times.append(time.perf_counter() - t0)
+
+    map = map_class(None, start, end, grid=grid)
+    tracemalloc.start()
+    runner(map)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "alg": alg,
+        "repeat": repeat,
+        "time_s": round(float(np.median(times)), 6),
+        "time_min_s": round(min(times), 6),
+        "n_checked": map.n_checked,
+        "n_expanded": getattr(map, "n_expanded", None),  # cost-based planners only
+        "peak_bytes": peak,
+        "route_length": length,
+        "found": length is not None,
+    }
+
+
+def version():
+    """
+    Code version measured: current git commit, if any.
+    """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(kinds, sizes, algs, repeat=3, seed=0, verbose=True):
+    """
+    Runs every planner on every map.
+
+    kinds: map kinds, keys of maps.GENERATORS ([str, ...])
+    sizes: map sides ([int, ...])
+    algs: planners, keys of ENGINES ([str, ...])
+    repeat: timed runs per planner and map (int)
+    seed: maps random seed (int)
+    verbose: print a line per result (bool)
+
+    return: records ([dict, ...])
+    """
+    records = []
+    for kind in kinds:
+        for size in sizes:
+            grid, start, end = generate(kind, size, seed)
+            if end is None:
+                print("[Warning] {0} {1}: no route, skipped.".format(kind, size), file=sys.stderr)
+                continue
+            for alg in algs:
+                record = {"kind": kind, "size": size, "seed": seed}
+                record.update(measure(alg, grid, start, end, repeat))
+                records.append(record)
+                if verbose:
+                    print("{kind}\t{size}\t{alg}\t{time_s}\t{n_checked}\t{peak_bytes}\t{route_length}".format(**record),
+                          file=sys.stderr)
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Planner benchmark suite.")
+    parser.add_argument('-k', '--kinds', nargs='+', choices=sorted(GENERATORS), default=sorted(GENERATORS), help='map kinds')
+    parser.add_argument('-n', '--sizes', nargs='+', type=int, default=DEFAULT_SIZES, help='map sides (up to {0})'.format(SIZES[-1]))
+    parser.add_argument('-a', '--algs', nargs='+', choices=list(ENGINES), default=list(ENGINES), help='planners')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='timed runs per planner and map')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='maps random seed')
+    parser.add_argument('--json', metavar='FILE', help='write results as JSON ("-" for stdout)')
+    parser.add_argument('--csv', metavar='FILE', help='write results as CSV ("-" for stdout)')
+    args = parser.parse_args()
+
+    records = run(args.kinds, args.sizes, args.algs, args.repeat, args.seed)
+    meta = {"version": version(), "python": platform.python_version(), "numpy": np.__version__}
+
+    if args.json:
+        out = sys.stdout if args.json == "-" else open(args.json, "w")
+        json.dump({"meta": meta, "results": records}, out, indent=2)
+        out.write("\n")
+        if out is not sys.stdout:
+            out.close()
+    if args.csv or not args.json:
+        out = sys.stdout if args.csv in (None, "-") else open(args.csv, "w", newline="")
+        writer = csv.DictWriter(out, fieldnames=FIELDS + ["version"])
+        writer.writeheader()
+        for record in records:
+            writer.writerow(dict(record, version=meta["version"]))
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -12,3 +12,11 @@ register(
     id='csv-colored-v0',
     entry_point='gym_csv.envs:CsvColoredEnv',
 )
+register(
+    id='csv-vec-v0',
+    entry_point='gym_csv.envs:VectorCsvEnv',
+)
+register(
+    id='csv-tiled-v0',
+    entry_point='gym_csv.envs:TiledCsvEnv',
+)
@@ -2,3 +2,5 @@
 from gym_csv.envs.csv_env import CsvEnv
 from gym_csv.envs.csv_pygame_env import CsvPyGameEnv
 from gym_csv.envs.csv_colored_env import CsvColoredEnv
+from gym_csv.envs.csv_vec_env import VectorCsvEnv
+from gym_csv.envs.csv_tiled_env import TiledCsvEnv
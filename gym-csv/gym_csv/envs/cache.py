@@ -0,0 +1,72 @@
+"""On-disk cache of the compiled models of the CSV grid environments.
+
+The dense transitions (next_states, rewards, dones) and the initial state
+distribution (isd) of an environment are stored as .npy files in a directory
+named after a hash of the map contents, start, goal and environment layout.
+Environments made again for the same map and endpoints memory-map them
+read-only instead of building them, so many workers share one copy.
+"""
+
+import os
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+from gym_csv.envs.transitions import GOAL_REWARD, WALL_REWARD
+
+# Change it when build_transitions() changes, so older models are not loaded.
+MODEL_VERSION = 1
+CACHE_DIR = os.environ.get('GYM_CSV_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'gym_csv'))
+ARRAYS = ('next_states', 'rewards', 'dones', 'isd')
+
+
+def model_key(name, tags, start, goal):
+    """
+    Cache key of a model: hash of the environment name, the tags the model
+    is built from, start, goal and reward constants.
+
+    name: environment layout, e.g. its class name (str)
+    tags: cell tags (np.ndarray (nrow, ncol))
+    start: start position ((int, int))
+    goal: goal position ((int, int))
+
+    return: key (str)
+    """
+    tags = np.ascontiguousarray(tags, dtype=np.uint8)
+    digest = hashlib.sha1(tags.tobytes())
+    digest.update(repr((MODEL_VERSION, tags.shape, tuple(start), tuple(goal),
+                        GOAL_REWARD, WALL_REWARD)).encode())
+    return '{0}-{1}'.format(name, digest.hexdigest())
+
+
+def cached_model(key, build, cache_dir=None):
+    """
+    Compiled model of key: loaded from the cache (read-only memory maps) if
+    it is there, else built and stored. Models that cannot be stored are
+    returned anyway.
+
+    key: cache key, see model_key() (str)
+    build: builds the model, returns next_states, rewards, dones and isd (callable)
+    cache_dir: cache directory, CACHE_DIR if None (str)
+
+    return: next_states, rewards, dones, isd (np.ndarray)
+    """
+    path = os.path.join(cache_dir or CACHE_DIR, key)
+    try:
+        return tuple(np.load(os.path.join(path, name + '.npy'), mmap_mode='r') for name in ARRAYS)
+    except (OSError, ValueError): # not cached, or partially removed
+        pass
+
+    model = build()
+    tmp = None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix='.' + key, dir=os.path.dirname(path))
+        for name, array in zip(ARRAYS, model):
+            np.save(os.path.join(tmp, name + '.npy'), array)
+        os.rename(tmp, path) # atomic, other workers see all the files or none
+    except OSError: # read-only cache, or stored by another worker meanwhile
+        pass
+    if tmp is not None:
+        shutil.rmtree(tmp, ignore_errors=True) # left over if not renamed
+    return model
@@ -5,8 +5,10 @@
 # https://towardsdatascience.com/reinforcement-learning-with-openai-d445c2c687d2
 
 import gym
-from gym.envs.toy_text import discrete
 import numpy as np
+from gym_csv.envs.maps import read_map, check_cell
+from gym_csv.envs.cache import model_key, cached_model
+from gym_csv.envs.transitions import DenseDiscreteEnv, build_transitions
 
 # X points down (rows)(v), Y points right (columns)(>), Z would point outwards.
 LEFT = 0  # < Decrease Y (column)
@@ -14,70 +16,55 @@ DOWN = 1  # v Increase X (row)
 RIGHT = 2 # > Increase Y (column)
 UP = 3    # ^ Decrease X (row)
 
-class CsvEnv(discrete.DiscreteEnv):
+# (row, col) increment of each action
+MOVES = [(0, -1), (1, 0), (0, 1), (-1, 0)] # LEFT, DOWN, RIGHT, UP
+
+class CsvEnv(DenseDiscreteEnv):
     """
     Has the following members
     - nS: number of states
     - nA: number of actions
     - P: transitions (*)
     - isd: initial state distribution (**)
+    - next_states, rewards, dones: dense transitions, (nS, nA) arrays used by step()
     (*) dictionary dict of dicts of lists, where
       P[s][a] == [(probability, nextstate, reward, done), ...]
     (**) list or array of length nS
     """
     metadata = {'render.modes': ['human']}
 
-    def __init__(self):
+    def __init__(self, map_file='map1.csv', start=(2, 2), goal=(7, 7), cache=True):
+        """
+        map_file: map path, CSV or binary (.npy) (str)
+        start: start position, (row, col) ((int, int))
+        goal: goal position, (row, col) ((int, int))
+        cache: load/store the compiled model from/to the on-disk cache (bool)
+        """
         # Remember: X points down, Y points right, thus Z points outwards.
-        # hard-coded vars (begin)
-        inFileStr = 'map1.csv'
-        initX = 2
-        initY = 2
-        goalX = 7
-        goalY = 7
-        # hard-coded vars (end)
-        self.inFile = np.genfromtxt(inFileStr, delimiter=',')
+        initX, initY = start
+        goalX, goalY = goal
+        self.inFile = read_map(map_file) # binary maps are memory-mapped copy-on-write
+        check_cell(start, self.inFile.shape, 'start')
+        check_cell(goal, self.inFile.shape, 'goal')
         self.inFile[goalX][goalY] = 3 # The goal (3) is fixed, so we paint it, but the robot (2) moves, so done at render().
         self.nrow, self.ncol = nrow, ncol = self.inFile.shape
-        nS = nrow * ncol # nS: number of states
-        nA = 4 # nA: number of actions
-        P = {s : {a : [] for a in range(nA)} for s in range(nS)} # transitions (*), filled in at the for loop below.
-        isd = np.zeros((nrow, ncol)) # initial state distribution (**)
-        isd[initX][initY] = 1
-        isd = isd.astype('float64').ravel() # ravel() is like flatten(). However, astype('float64') is just in case.
-
-        def to_s(row, col):
-            return row*ncol + col
 
-        def inc(row, col, a): # Assures we will not go off limits.
-            if a == LEFT:
-                col = max(col-1,0)
-            elif a == DOWN:
-                row = min(row+1,nrow-1)
-            elif a == RIGHT:
-                col = min(col+1,ncol-1)
-            elif a == UP:
-                row = max(row-1,0)
-            return (row, col)
+        def build():
+            isd = np.zeros((nrow, ncol)) # initial state distribution (**)
+            isd[initX][initY] = 1
+            isd = isd.astype('float64').ravel() # ravel() is like flatten(). However, astype('float64') is just in case.
+            # Dense transitions (*): next state, reward and done for every state and action.
+            return build_transitions(self.inFile, MOVES, goal=3) + (isd,)
 
-        for row in range(nrow): # Fill in P[s][a] transitions and rewards
-            for col in range(ncol):
-                s = to_s(row, col)
-                for a in range(4):
-                    li = P[s][a] # In Python this is not a deep copy, therefore we are appending to actual P[s][a] !!
-                    tag = self.inFile[row][col]
-                    if tag == 3: # goal
-                        li.append((1.0, s, 1.0, True)) # (probability, nextstate, reward, done)
-                    elif tag == 1: # wall
-                        li.append((1.0, s, -500.0, True)) # (probability, nextstate, reward, done) # Some algorithms fail with reward -float('inf')
-                    else: # e.g. tag == 0
-                        newrow, newcol = inc(row, col, a)
-                        newstate = to_s(newrow, newcol)
-                        li.append((1.0, newstate, 0.0, False)) # (probability, nextstate, reward, done)
+        if cache:
+            key = model_key('CsvEnv', self.inFile, start, goal)
+            next_states, rewards, dones, isd = cached_model(key, build)
+        else:
+            next_states, rewards, dones, isd = build()
 
-        super(CsvEnv, self).__init__(nS, nA, P, isd)
+        super(CsvEnv, self).__init__(next_states, rewards, dones, isd)
 
-    # DO NOT UNCOMMENT, LET 'discrete.DiscreteEnv' IMPLEMENT IT!
+    # DO NOT UNCOMMENT, LET 'DenseDiscreteEnv' IMPLEMENT IT!
     #def step(self, action):
     #    print('CsvEnv.step', action)
 
@@ -5,8 +5,10 @@
 # https://towardsdatascience.com/reinforcement-learning-with-openai-d445c2c687d2
 
 import gym
-from gym.envs.toy_text import discrete
 import numpy as np
+from gym_csv.envs.maps import read_map, check_cell
+from gym_csv.envs.cache import model_key, cached_model
+from gym_csv.envs.transitions import DenseDiscreteEnv, build_transitions
 import pygame
 import time
 
@@ -16,77 +18,75 @@ UP = 1  # ^ Decrease X (row)
 LEFT = 2 # < Decrease Y (column)
 DOWN = 3    # v Increase X (row)
 
+# Increment of each action in state layout, where state rows are map columns.
+MOVES = [(1, 0), (0, -1), (-1, 0), (0, 1)] # RIGHT, UP, LEFT, DOWN
+
 SCREEN_WIDTH, SCREEN_HEIGHT = 640, 480
 COLOR_BACKGROUND = (0, 0, 0)
 COLOR_WALL = (255, 255, 255)
 COLOR_ROBOT = (255, 0, 0)
+COLOR_GOAL = (0, 255, 0)
+
+# Color of every cell code, map cells are drawn through it.
+PALETTE = np.zeros((256, 3), dtype=np.uint8) # COLOR_BACKGROUND
+PALETTE[1] = COLOR_WALL
+PALETTE[3] = COLOR_GOAL
 
-class CsvPyGameEnv(discrete.DiscreteEnv):
+class CsvPyGameEnv(DenseDiscreteEnv):
     """
     Has the following members
     - nS: number of states
     - nA: number of actions
     - P: transitions (*)
     - isd: initial state distribution (**)
+    - next_states, rewards, dones: dense transitions, (nS, nA) arrays used by step()
     (*) dictionary dict of dicts of lists, where
       P[s][a] == [(probability, nextstate, reward, done), ...]
     (**) list or array of length nS
     """
     metadata = {'render.modes': ['human']}
-
-    def __init__(self):
+    transposed = True # States index the transposed map (state row = map column).
+
+    def __init__(self, map_file='map1.csv', start=(2, 2), goal=(7, 7), cache=True, fps=None):
+        """
+        map_file: map path, CSV or binary (.npy) (str)
+        start: start position, (row, col) ((int, int))
+        goal: goal position, (row, col) ((int, int))
+        cache: load/store the compiled model from/to the on-disk cache (bool)
+        fps: render() waits to draw at most fps frames per second, no limit if None (float)
+        """
         # Remember: X points down, Y points right, thus Z points outwards.
-        # hard-coded vars (begin)
-        inFileStr = 'map1.csv'
-        initX = 2
-        initY = 2
-        goalX = 7
-        goalY = 7
-        # hard-coded vars (end)
-        self.inFile = np.genfromtxt(inFileStr, delimiter=',')
+        initX, initY = start
+        goalX, goalY = goal
+        self.inFile = read_map(map_file) # binary maps are memory-mapped copy-on-write
+        check_cell(start, self.inFile.shape, 'start')
+        check_cell(goal, self.inFile.shape, 'goal')
         self.inFile[goalX][goalY] = 3 # The goal (3) is fixed, so we paint it, but the robot (2) moves, so done at render().
         self.nrow, self.ncol = nrow, ncol = self.inFile.shape
-        nS = nrow * ncol # nS: number of states
-        nA = 4 # nA: number of actions
-        P = {s : {a : [] for a in range(nA)} for s in range(nS)} # transitions (*), filled in at the for loop below.
-        isd = np.zeros((nrow, ncol)) # initial state distribution (**)
-        isd[initX][initY] = 1
-        isd = isd.astype('float64').ravel() # ravel() is like flatten(). However, astype('float64') is just in case.
-
-        def to_s(row, col):
-            return row*ncol + col
-
-        def inc(col, row, a): # Assures we will not go off limits.
-            if a == LEFT:
-                col = max(col-1,0)
-            elif a == DOWN:
-                row = min(row+1,nrow-1)
-            elif a == RIGHT:
-                col = min(col+1,ncol-1)
-            elif a == UP:
-                row = max(row-1,0)
-            return (col, row)
-
-        for row in range(nrow): # Fill in P[s][a] transitions and rewards
-            for col in range(ncol):
-                s = to_s(row, col)
-                for a in range(4):
-                    li = P[s][a] # In Python this is not a deep copy, therefore we are appending to actual P[s][a] !!
-                    tag = self.inFile[col][row]
-                    if tag == 3: # goal
-                        li.append((1.0, s, 1.0, True)) # (probability, nextstate, reward, done)
-                    elif tag == 1: # wall
-                        li.append((1.0, s, -500.0, True)) # (probability, nextstate, reward, done) # Some algorithms fail with reward -float('inf')
-                    else: # e.g. tag == 0
-                        newrow, newcol = inc(row, col, a)
-                        newstate = to_s(newrow, newcol)
-                        li.append((1.0, newstate, 0.0, False)) # (probability, nextstate, reward, done)
+
+        def build():
+            isd = np.zeros((ncol, nrow)) # initial state distribution (**), transposed like the states
+            isd[initY][initX] = 1
+            isd = isd.astype('float64').ravel() # ravel() is like flatten(). However, astype('float64') is just in case.
+            # Dense transitions (*): next state, reward and done for every state and action.
+            # States are indexed transposed (state row = map column), so tags are transposed too.
+            return build_transitions(self.inFile.T, MOVES, goal=3) + (isd,)
+
+        if cache:
+            key = model_key('CsvPyGameEnv', self.inFile, start, goal)
+            next_states, rewards, dones, isd = cached_model(key, build)
+        else:
+            next_states, rewards, dones, isd = build()
 
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), 0, 32)
+        self.background = None # static map, drawn once at the first render()
+        self.drawn = None # screen rect of the cell where the robot was last drawn
+        self.fps = fps
+        self.clock = pygame.time.Clock()
 
-        super(CsvPyGameEnv, self).__init__(nS, nA, P, isd)
+        super(CsvPyGameEnv, self).__init__(next_states, rewards, dones, isd)
 
-    # DO NOT UNCOMMENT, LET 'discrete.DiscreteEnv' IMPLEMENT IT!
+    # DO NOT UNCOMMENT, LET 'DenseDiscreteEnv' IMPLEMENT IT!
     #def step(self, action):
     #    print('CsvEnv.step', action)
 
@@ -94,34 +94,42 @@ class CsvPyGameEnv(discrete.DiscreteEnv):
     #def reset(self):
     #    print('CsvEnv.reset')
 
+    def draw_background(self):
+        """
+        Draws the map on a screen-sized Surface: one pixel per cell through
+        PALETTE (surfarray indexes (x, y), so the map is transposed), then
+        scaled to the screen.
+        """
+        cells = pygame.surfarray.make_surface(PALETTE[np.asarray(self.inFile, dtype=np.uint8).T])
+        return pygame.transform.scale(cells, (SCREEN_WIDTH, SCREEN_HEIGHT)).convert(self.screen)
+
+    def cell_rect(self, row, col):
+        """
+        Screen rect of a map cell, at least one pixel wide and high.
+        """
+        left, top = col * SCREEN_WIDTH // self.ncol, row * SCREEN_HEIGHT // self.nrow
+        right, bottom = (col + 1) * SCREEN_WIDTH // self.ncol, (row + 1) * SCREEN_HEIGHT // self.nrow
+        return pygame.Rect(left, top, max(right - left, 1), max(bottom - top, 1))
+
     def render(self, mode='human'):
         #print('CsvEnv.render', mode)
-        row, col = self.s // self.ncol, self.s % self.ncol # Opposite of ravel().
-        #viewer = np.copy(self.inFile) # Force a deep copy for rendering.
-        #viewer[row, col] = 2
-        #print viewer
-        self.screen.fill(COLOR_BACKGROUND)
-        for iX in range(self.nrow):
-            #print "iX:",iX
-            for iY in range(self.ncol):
-                #print "* iY:",iY
-
-                pixelX = SCREEN_WIDTH/self.nrow
-                pixelY = SCREEN_HEIGHT/self.ncol
-
-                #-- Skip box if map indicates a 0
-                if self.inFile[iX][iY] == 0:
-                    continue
-                if self.inFile[iX][iY] == 1:
-                    pygame.draw.rect(self.screen, COLOR_WALL,
-                                     pygame.Rect( pixelX*iY, pixelY*iX, pixelX, pixelY ))
-                if self.inFile[iX][iY] == 3:
-                    pygame.draw.rect(self.screen, (0,255,0),
-                                     pygame.Rect( pixelX*iY, pixelY*iX, pixelX, pixelY ))
-                robot = pygame.draw.rect(self.screen, COLOR_ROBOT,
-                                         pygame.Rect( pixelX*row+pixelX/4.0, pixelY*col+pixelY/4.0, pixelX/2.0, pixelY/2.0 ))
-        pygame.display.flip()
-
+        row, col = self.s // self.nrow, self.s % self.nrow # Opposite of ravel() on the transposed map: map (col, row).
+        # The map is static, so it is drawn once and each frame only restores
+        # the cell the robot left and draws the robot at its new cell.
+        rect = self.cell_rect(col, row)
+        if self.background is None:
+            self.background = self.draw_background()
+            self.screen.blit(self.background, (0, 0))
+            dirty = [self.screen.get_rect()]
+        else:
+            self.screen.blit(self.background, self.drawn, self.drawn)
+            dirty = [self.drawn, rect]
+        robot = rect.inflate(-(rect.width // 2), -(rect.height // 2))
+        self.screen.fill(COLOR_ROBOT, robot)
+        self.drawn = rect
+        if self.fps:
+            self.clock.tick(self.fps)
+        pygame.display.update(dirty)
 
     def close(self):
         print('CsvEnv.close')
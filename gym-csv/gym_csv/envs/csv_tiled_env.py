@@ -0,0 +1,105 @@
+# https://github.com/openai/gym/blob/849da90011f877853589c407c170d3c07f680d52/gym/core.py
+# https://github.com/openai/gym/blob/849da90011f877853589c407c170d3c07f680d52/gym/envs/toy_text/discrete.py
+
+import gym
+from gym import spaces
+from gym.utils import seeding
+import numpy as np
+from gym_csv.envs.maps import open_tiled_map, check_cell
+from gym_csv.envs.transitions import GOAL_REWARD, WALL_REWARD
+from gym_csv.envs.csv_env import MOVES
+
+# Same actions as CsvEnv (csv-v0).
+# X points down (rows)(v), Y points right (columns)(>), Z would point outwards.
+LEFT = 0  # < Decrease Y (column)
+DOWN = 1  # v Increase X (row)
+RIGHT = 2 # > Increase Y (column)
+UP = 3    # ^ Decrease X (row)
+
+WALL = 1
+GOAL = 3
+VIEW = 10 # side of the window drawn around the robot
+
+class TiledCsvEnv(gym.Env):
+    """
+    CsvEnv (csv-v0) for maps larger than memory: no transition model (P)
+    is built, step() reads the cell of the robot from a tiled map (see
+    tools/tiles.py), which keeps only the tiles around the robot resident.
+    Has the following members
+    - nS: number of states
+    - nA: number of actions
+    - map: cell codes, read cell by cell (tools.tiles.TiledGrid, or np.ndarray without tiled map)
+    - s: current state
+    """
+    metadata = {'render.modes': ['human']}
+
+    def __init__(self, max_tiles=9, map_file='map1.csv', start=(2, 2), goal=(7, 7)):
+        """
+        max_tiles: tiles kept in memory (int)
+        map_file: map path, tiled map directory, or CSV/binary map whose tiled map (map1.csv -> map1.tiles) is used if there is one (str)
+        start: start position, (row, col) ((int, int))
+        goal: goal position, (row, col) ((int, int))
+        """
+        # Remember: X points down, Y points right, thus Z points outwards.
+        initX, initY = start
+        goalX, goalY = goal
+        self.map = open_tiled_map(map_file, max_tiles)
+        self.nrow, self.ncol = self.map.shape
+        check_cell(start, self.map.shape, 'start')
+        check_cell(goal, self.map.shape, 'goal')
+        self.goal = (goalX, goalY) # The goal (3) is fixed, but not painted: written tiles would stay resident.
+        self.s0 = initX * self.ncol + initY
+        self.nS, self.nA = self.nrow * self.ncol, len(MOVES)
+
+        self.action_space = spaces.Discrete(self.nA)
+        self.observation_space = spaces.Discrete(self.nS)
+
+        self.seed()
+        self.s = self.s0
+        self.lastaction = None
+
+    def seed(self, seed=None):
+        self.np_random, seed = seeding.np_random(seed)
+        return [seed]
+
+    def cell(self, row, col):
+        """
+        Tag of a cell: map code, or GOAL at the goal.
+        """
+        if (row, col) == self.goal:
+            return GOAL
+        return int(self.map[row, col])
+
+    def reset(self):
+        self.s = self.s0
+        self.lastaction = None
+        return self.s
+
+    def step(self, a):
+        # Same model as build_transitions(): goal and wall cells are absorbing (done).
+        s = self.s
+        row, col = s // self.ncol, s % self.ncol # Opposite of ravel().
+        self.lastaction = a
+        tag = self.cell(row, col)
+        if tag == GOAL:
+            return (s, GOAL_REWARD, True, {"prob" : 1.0})
+        if tag == WALL:
+            return (s, WALL_REWARD, True, {"prob" : 1.0})
+        drow, dcol = MOVES[a]
+        row = min(max(row + drow, 0), self.nrow - 1)
+        col = min(max(col + dcol, 0), self.ncol - 1)
+        self.s = row * self.ncol + col
+        return (self.s, 0.0, False, {"prob" : 1.0})
+
+    def render(self, mode='human'):
+        # Only a VIEW x VIEW window around the robot (2), the map may not fit in memory.
+        row, col = self.s // self.ncol, self.s % self.ncol
+        top = min(max(row - VIEW // 2, 0), max(self.nrow - VIEW, 0))
+        left = min(max(col - VIEW // 2, 0), max(self.ncol - VIEW, 0))
+        viewer = np.array([[self.cell(x, y) for y in range(left, min(left + VIEW, self.ncol))]
+                           for x in range(top, min(top + VIEW, self.nrow))])
+        viewer[row - top, col - left] = 2
+        print(viewer)
+
+    def close(self):
+        print('TiledCsvEnv.close')
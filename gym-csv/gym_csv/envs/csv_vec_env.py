@@ -0,0 +1,114 @@
+# https://github.com/openai/gym/blob/849da90011f877853589c407c170d3c07f680d52/gym/core.py
+# https://github.com/openai/gym/blob/849da90011f877853589c407c170d3c07f680d52/gym/envs/toy_text/discrete.py
+
+import gym
+from gym import spaces
+from gym.utils import seeding
+import numpy as np
+from gym_csv.envs.maps import read_map, check_cell
+from gym_csv.envs.cache import model_key, cached_model
+from gym_csv.envs.transitions import build_transitions
+from gym_csv.envs.csv_env import MOVES
+
+# Same actions as CsvEnv (csv-v0).
+# X points down (rows)(v), Y points right (columns)(>), Z would point outwards.
+LEFT = 0  # < Decrease Y (column)
+DOWN = 1  # v Increase X (row)
+RIGHT = 2 # > Increase Y (column)
+UP = 3    # ^ Decrease X (row)
+
+class VectorCsvEnv(gym.Env):
+    """
+    num_envs CsvEnv episodes stepped in lockstep with NumPy gathers.
+    Has the following members
+    - nS: number of states
+    - nA: number of actions
+    - isd: initial state distribution, list or array of length nS
+    - next_states, rewards, dones: dense transitions, (nS, nA) arrays shared by all the episodes
+    - s: current state of every episode, array of length num_envs
+    Finished episodes are reset automatically: step() returns their new
+    initial state, and their last state at info['terminal_states'].
+    """
+    metadata = {'render.modes': ['human']}
+
+    def __init__(self, num_envs=16, map_file='map1.csv', start=(2, 2), goal=(7, 7), cache=True):
+        """
+        num_envs: episodes stepped in lockstep (int)
+        map_file: map path, CSV or binary (.npy) (str)
+        start: start position, (row, col) ((int, int))
+        goal: goal position, (row, col) ((int, int))
+        cache: load/store the compiled model from/to the on-disk cache, shared with CsvEnv (bool)
+        """
+        # Remember: X points down, Y points right, thus Z points outwards.
+        initX, initY = start
+        goalX, goalY = goal
+        self.inFile = read_map(map_file) # binary maps are memory-mapped copy-on-write
+        check_cell(start, self.inFile.shape, 'start')
+        check_cell(goal, self.inFile.shape, 'goal')
+        self.inFile[goalX][goalY] = 3 # The goal (3) is fixed, so we paint it, but the robots (2) move, so done at render().
+        self.nrow, self.ncol = nrow, ncol = self.inFile.shape
+
+        def build():
+            isd = np.zeros((nrow, ncol))
+            isd[initX][initY] = 1
+            return build_transitions(self.inFile, MOVES, goal=3) + (isd.astype('float64').ravel(),)
+
+        if cache:
+            key = model_key('CsvEnv', self.inFile, start, goal) # same model as CsvEnv
+            self.next_states, self.rewards, self.dones, self.isd = cached_model(key, build)
+        else:
+            self.next_states, self.rewards, self.dones, self.isd = build()
+        self.isd_cdf = np.cumsum(self.isd)
+
+        self.nS, self.nA = self.next_states.shape
+        self.num_envs = num_envs
+
+        self.action_space = spaces.MultiDiscrete([self.nA] * num_envs)
+        self.observation_space = spaces.MultiDiscrete([self.nS] * num_envs)
+
+        self.seed()
+        self.s = self.sample_initial(num_envs)
+
+    def seed(self, seed=None):
+        self.np_random, seed = seeding.np_random(seed)
+        return [seed]
+
+    def sample_initial(self, n):
+        """
+        Samples n initial states from isd.
+
+        return: states (np.ndarray of int64)
+        """
+        return np.searchsorted(self.isd_cdf, self.np_random.rand(n), side='right')
+
+    def reset(self):
+        self.s = self.sample_initial(self.num_envs)
+        return self.s.copy()
+
+    def step(self, actions):
+        """
+        Steps every episode.
+
+        actions: one action per episode (array of length num_envs)
+
+        return: next states, rewards, dones (arrays of length num_envs) and info (dict)
+        """
+        actions = np.asarray(actions)
+        s = self.s
+        next_states = self.next_states[s, actions]
+        rewards = self.rewards[s, actions]
+        dones = self.dones[s, actions]
+        info = {'terminal_states': next_states.copy()}
+        if dones.any():
+            next_states[dones] = self.sample_initial(np.count_nonzero(dones))
+        self.s = next_states
+        return next_states.copy(), rewards, dones, info
+
+    def render(self, mode='human'):
+        rows, cols = np.divmod(self.s, self.ncol) # Opposite of ravel().
+        viewer = np.copy(self.inFile) # Force a deep copy for rendering.
+        viewer[rows, cols] = 2
+        print(viewer)
+
+    def close(self):
+        print('VectorCsvEnv.close')
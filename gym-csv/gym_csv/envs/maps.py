@@ -0,0 +1,42 @@
+"""Map files of the CSV grid environments: CSV text, binary (.npy) or tiled maps.
+
+The map formats are implemented once, by the planners (tools/utils.py and
+tools/tiles.py), and read from there: the tools package is installed along
+with gym_csv (see setup.py).
+"""
+
+import os
+from tools.utils import read_grid
+from tools.tiles import TiledGrid
+
+
+def read_map(filename):
+    """
+    Reads a map of cell codes (uint8), see tools.utils.read_grid(). Binary
+    maps (2D uint8 .npy arrays, which replace CSV ones with the same name)
+    are memory-mapped copy-on-write, so loading them copies nothing.
+    Raise tools.utils.UserInputException if the map is not found or invalid.
+    """
+    return read_grid(filename, mmap_mode='c')
+
+
+def open_tiled_map(filename, max_tiles=9):
+    """
+    Opens a map for cell by cell access: a tiled map directory, the tiled
+    map with the same name as a CSV one (map1.csv -> map1.tiles) or else the
+    whole map, read with read_map().
+    """
+    root, ext = os.path.splitext(filename)
+    if os.path.isdir(filename):
+        return TiledGrid(filename, max_tiles=max_tiles)
+    if ext == '.csv' and os.path.isdir(root + '.tiles'):
+        return TiledGrid(root + '.tiles', max_tiles=max_tiles)
+    return read_map(filename)
+
+
+def check_cell(cell, shape, name):
+    """
+    Raise ValueError if cell ((int, int)) is out of a map of shape (nrow, ncol).
+    """
+    if len(cell) != 2 or not (0 <= cell[0] < shape[0] and 0 <= cell[1] < shape[1]):
+        raise ValueError('{0} {1} out of map {2}'.format(name, tuple(cell), tuple(shape)))
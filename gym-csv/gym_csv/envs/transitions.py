@@ -0,0 +1,108 @@
+"""Dense transition model shared by the CSV grid environments."""
+
+from collections import OrderedDict
+from collections.abc import Mapping
+import operator
+from gym.envs.toy_text import discrete
+import numpy as np
+
+GOAL_REWARD = 1.0
+WALL_REWARD = -500.0 # Some algorithms fail with reward -float('inf')
+
+
+def build_transitions(tags, moves, goal, wall=1):
+    """
+    Builds the deterministic transition model of a grid with NumPy.
+    Goal and wall cells are absorbing (done), any other cell moves to its
+    neighbour (clipped at the grid limits) with reward 0.
+
+    tags: cell tags in state layout, state s is tags.flat[s] (np.ndarray (nrow, ncol))
+    moves: (drow, dcol) increment of each action ([(int, int), ...])
+    goal: goal tag (int)
+    wall: wall tag (int)
+
+    return: next_states (nS, nA) int64, rewards (nS, nA) float64, dones (nS, nA) bool
+    """
+    nrow, ncol = tags.shape
+    nS, nA = nrow * ncol, len(moves)
+    rows, cols = np.divmod(np.arange(nS), ncol)
+
+    next_states = np.empty((nS, nA), dtype=np.int64)
+    for a, (drow, dcol) in enumerate(moves):
+        next_states[:, a] = np.clip(rows + drow, 0, nrow - 1) * ncol + np.clip(cols + dcol, 0, ncol - 1)
+
+    flat = np.asarray(tags).ravel()
+    is_goal = flat == goal
+    is_wall = flat == wall
+    terminal = is_goal | is_wall
+    next_states[terminal] = np.flatnonzero(terminal)[:, None] # stay
+
+    rewards = np.zeros((nS, nA))
+    rewards[is_goal] = GOAL_REWARD
+    rewards[is_wall] = WALL_REWARD
+    dones = np.repeat(terminal[:, None], nA, axis=1)
+    return next_states, rewards, dones
+
+
+class LazyTransitions(Mapping):
+    """
+    DiscreteEnv transitions read-only mapping computed from the dense model
+    on access: P[s] is the dict {a : [(probability, nextstate, reward, done)]}
+    of state s, built when read and kept in a cache of the cache_size least
+    recently read states. Memory stays proportional to the map instead of
+    nS x nA Python lists.
+    """
+
+    def __init__(self, next_states, rewards, dones, cache_size=1024):
+        self.next_states = next_states
+        self.rewards = rewards
+        self.dones = dones
+        self.cache_size = cache_size
+        self.cache = OrderedDict() # s -> transitions of s, least recently read first
+
+    def __getitem__(self, s):
+        try:
+            s = operator.index(s)
+        except TypeError:
+            raise KeyError(s)
+        if not 0 <= s < len(self):
+            raise KeyError(s)
+        row = self.cache.pop(s, None)
+        if row is None:
+            ns, r, d = self.next_states[s].tolist(), self.rewards[s].tolist(), self.dones[s].tolist()
+            row = {a : [(1.0, ns[a], r[a], d[a])] for a in range(len(ns))}
+        if self.cache_size > 0:
+            self.cache[s] = row
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return row
+
+    def __iter__(self):
+        return iter(range(len(self)))
+
+    def __len__(self):
+        return self.next_states.shape[0]
+
+
+class DenseDiscreteEnv(discrete.DiscreteEnv):
+    """
+    DiscreteEnv whose deterministic transition model is stored as dense
+    (nS, nA) arrays: next_states, rewards and dones.
+    P is still provided for code reading it, as a LazyTransitions mapping
+    built on access, but step() indexes the arrays instead of sampling over
+    a one-element list.
+    """
+
+    def __init__(self, next_states, rewards, dones, isd, cache_size=1024):
+        self.next_states = next_states
+        self.rewards = rewards
+        self.dones = dones
+        nS, nA = next_states.shape
+        P = LazyTransitions(next_states, rewards, dones, cache_size)
+        super(DenseDiscreteEnv, self).__init__(nS, nA, P, isd)
+
+    def step(self, a):
+        s = self.s
+        self.s = int(self.next_states[s, a])
+        self.lastaction = a
+        return (self.s, float(self.rewards[s, a]), bool(self.dones[s, a]), {"prob" : 1.0})
@@ -0,0 +1,171 @@
+"""Planning solvers over the transition model of the CSV grid environments.
+
+The model of any CsvEnv-family environment is turned into one sparse matrix,
+so that value iteration, policy iteration and policy evaluation run as
+vectorised sweeps. Values and policies are returned in map layout, arrays
+shaped (nrow, ncol).
+"""
+
+from collections import namedtuple
+import numpy as np
+from scipy import sparse
+
+# T: (nS * nA, nS) sparse matrix, row s * nA + a holds the probabilities of
+#    the next states of (s, a) that continue the episode (not done)
+# R: (nS, nA) expected rewards
+# shape: (nrow, ncol) of the map
+# transposed: states index the transposed map (state row = map column)
+Model = namedtuple('Model', ['T', 'R', 'shape', 'transposed'])
+
+
+def build_model(env):
+    """
+    Builds the sparse model of an environment: from its dense transitions
+    (next_states, rewards, dones) if it has them, else from P.
+
+    env: CsvEnv-family environment, wrapped or not (gym.Env)
+
+    return: model (Model)
+    """
+    env = getattr(env, 'unwrapped', env)
+    shape = (env.nrow, env.ncol)
+    transposed = getattr(env, 'transposed', False)
+    if hasattr(env, 'next_states'):
+        nS, nA = env.next_states.shape
+        keep = ~np.asarray(env.dones, dtype=bool).ravel()
+        rows = np.arange(nS * nA)
+        T = sparse.csr_matrix((keep.astype(np.float64), (rows, env.next_states.ravel())), shape=(nS * nA, nS))
+        return Model(T, np.asarray(env.rewards, dtype=np.float64), shape, transposed)
+
+    nS, nA = env.nS, env.nA
+    rows, cols, probs = [], [], []
+    R = np.zeros((nS, nA))
+    for s in range(nS):
+        for a in range(nA):
+            for p, ns, r, d in env.P[s][a]:
+                R[s, a] += p * r
+                if not d:
+                    rows.append(s * nA + a)
+                    cols.append(ns)
+                    probs.append(p)
+    T = sparse.csr_matrix((probs, (rows, cols)), shape=(nS * nA, nS)) # duplicates are summed
+    return Model(T, R, shape, transposed)
+
+
+def to_map(model, values):
+    """
+    Per state values (length nS) as a map layout array (nrow, ncol).
+    """
+    nrow, ncol = model.shape
+    if model.transposed:
+        return values.reshape(ncol, nrow).T
+    return values.reshape(nrow, ncol)
+
+
+def from_map(model, values):
+    """
+    Map layout array (nrow, ncol) or per state values as per state values (length nS).
+    """
+    values = np.asarray(values)
+    if values.ndim == 1:
+        return values
+    return (values.T if model.transposed else values).ravel()
+
+
+def q_values(model, V, gamma):
+    """
+    Action values of every state for state values V.
+
+    return: Q (np.ndarray (nS, nA))
+    """
+    return model.R + gamma * (model.T @ V).reshape(model.R.shape)
+
+
+def evaluate(model, policy, gamma, tol, max_iter, V=None):
+    """
+    Iterative policy evaluation of a per state policy.
+
+    return: state values (np.ndarray, length nS), sweeps done (int)
+    """
+    nS, nA = model.R.shape
+    rows = np.arange(nS) * nA + policy
+    T, R = model.T[rows], model.R[np.arange(nS), policy]
+    V = np.zeros(nS) if V is None else V
+    for i in range(1, max_iter + 1):
+        V_new = R + gamma * (T @ V)
+        delta = np.max(np.abs(V_new - V))
+        V = V_new
+        if delta < tol:
+            break
+    return V, i
+
+
+def policy_evaluation(env, policy, gamma=0.99, tol=1e-8, max_iter=10000):
+    """
+    Values of following a policy.
+
+    env: environment or its model (gym.Env or Model)
+    policy: action per cell (np.ndarray (nrow, ncol)) or per state (np.ndarray (nS,))
+    gamma: discount factor (float)
+    tol: stop when no value changes more than tol in a sweep (float)
+    max_iter: maximum number of sweeps (int)
+
+    return: values (np.ndarray (nrow, ncol))
+    """
+    model = env if isinstance(env, Model) else build_model(env)
+    policy = from_map(model, policy).astype(np.int64)
+    V, _ = evaluate(model, policy, gamma, tol, max_iter)
+    return to_map(model, V)
+
+
+def value_iteration(env, gamma=0.99, tol=1e-8, max_iter=10000):
+    """
+    Optimal values and greedy policy by value iteration.
+
+    env: environment or its model (gym.Env or Model)
+    gamma: discount factor (float)
+    tol: stop when no value changes more than tol in a sweep (float)
+    max_iter: maximum number of sweeps (int)
+
+    return: values (np.ndarray (nrow, ncol)), policy (np.ndarray (nrow, ncol) of int64)
+    """
+    model = env if isinstance(env, Model) else build_model(env)
+    V = np.zeros(model.R.shape[0])
+    for _ in range(max_iter):
+        V_new = q_values(model, V, gamma).max(axis=1)
+        delta = np.max(np.abs(V_new - V))
+        V = V_new
+        if delta < tol:
+            break
+    policy = q_values(model, V, gamma).argmax(axis=1)
+    return to_map(model, V), to_map(model, policy)
+
+
+def policy_iteration(env, gamma=0.99, tol=1e-8, max_iter=1000, eval_iter=10000):
+    """
+    Optimal values and policy by policy iteration: policy evaluation sweeps
+    (warm started from the last values) and greedy improvement, until the
+    policy is stable.
+
+    env: environment or its model (gym.Env or Model)
+    gamma: discount factor (float)
+    tol: policy evaluation tolerance (float)
+    max_iter: maximum number of improvements (int)
+    eval_iter: maximum number of sweeps of each policy evaluation (int)
+
+    return: values (np.ndarray (nrow, ncol)), policy (np.ndarray (nrow, ncol) of int64)
+    """
+    model = env if isinstance(env, Model) else build_model(env)
+    nS = model.R.shape[0]
+    policy = np.zeros(nS, dtype=np.int64)
+    V = np.zeros(nS)
+    for _ in range(max_iter):
+        V, _ = evaluate(model, policy, gamma, tol, eval_iter, V)
+        Q = q_values(model, V, gamma)
+        # keep the current action on ties, so that the loop ends
+        best = Q.argmax(axis=1)
+        stable = Q[np.arange(nS), policy] >= Q[np.arange(nS), best] - tol
+        if stable.all():
+            break
+        policy = np.where(stable, policy, best)
+    return to_map(model, V), to_map(model, policy)
@@ -0,0 +1,149 @@
+"""Tabular Q-learning and SARSA trainers for the CSV grid environments.
+
+The Q-table is a (nS, nA) NumPy array and num_envs episodes are stepped in
+lockstep by indexing the dense transition model of the environment
+(next_states, rewards, dones), so a training step is a few array operations
+for all the episodes instead of one env.step() call per transition.
+"""
+
+from collections import namedtuple
+import time
+import numpy as np
+from gym_csv.solvers import Model, to_map
+
+# Q: (nS, nA) action values
+# policy: greedy action per cell, (nrow, ncol) map layout
+# steps: transitions simulated
+# steps_per_sec: transitions simulated per second
+# returns: undiscounted return of every finished episode, in finishing order
+TrainResult = namedtuple('TrainResult', ['Q', 'policy', 'steps', 'steps_per_sec', 'returns'])
+
+
+def constant_schedule(epsilon):
+    """
+    Same epsilon for every episode.
+    """
+    return lambda episode: epsilon
+
+
+def linear_schedule(start, end, episodes):
+    """
+    Epsilon from start to end over the first episodes, then end.
+    """
+    return lambda episode: end + (start - end) * max(0.0, 1.0 - episode / float(episodes))
+
+
+def exponential_schedule(start, end, decay):
+    """
+    Epsilon from start towards end, multiplied by decay every episode.
+    """
+    return lambda episode: end + (start - end) * decay ** episode
+
+
+def train(env, method='q_learning', episodes=10000, num_envs=64, alpha=0.1, gamma=0.99,
+          epsilon=linear_schedule(1.0, 0.05, 5000), max_steps=None, seed=None, log_every=None):
+    """
+    Trains a Q-table with episodes stepped in lockstep. Updates of the same
+    state and action in one step are averaged.
+
+    env: environment with dense transitions (next_states, rewards, dones) and isd, wrapped or not (gym.Env)
+    method: 'q_learning' or 'sarsa' (str)
+    episodes: episodes to finish (int)
+    num_envs: episodes stepped in lockstep (int)
+    alpha: learning rate (float)
+    gamma: discount factor (float)
+    epsilon: exploration per finished episode count (callable) or constant (float)
+    max_steps: episodes are cut after max_steps steps, nS if None (int)
+    seed: random seed (int)
+    log_every: print progress every log_every finished episodes, never if None (int)
+
+    return: result (TrainResult)
+    """
+    env = getattr(env, 'unwrapped', env)
+    if not hasattr(env, 'next_states'):
+        raise ValueError('environment has no dense transition model (next_states, rewards, dones)')
+    if method not in ('q_learning', 'sarsa'):
+        raise ValueError('unknown method: {0}'.format(method))
+    if not callable(epsilon):
+        epsilon = constant_schedule(epsilon)
+    next_states, rewards, dones = env.next_states, env.rewards, env.dones
+    nS, nA = next_states.shape
+    max_steps = nS if max_steps is None else max_steps
+    rng = np.random.default_rng(seed)
+    isd_cdf = np.cumsum(np.asarray(env.isd, dtype=np.float64))
+    isd_cdf /= isd_cdf[-1]
+
+    Q = np.zeros((nS, nA))
+    Qf = Q.reshape(-1) # flat view, index s * nA + a
+    s = np.searchsorted(isd_cdf, rng.random(num_envs), side='right')
+    a = act(Q, s, epsilon(0), rng)
+    lengths = np.zeros(num_envs, dtype=np.int64)
+    totals = np.zeros(num_envs)
+    returns = []
+    steps = 0
+    t0 = time.perf_counter()
+
+    while len(returns) < episodes:
+        eps = epsilon(len(returns))
+        ns, r, d = next_states[s, a], rewards[s, a], dones[s, a]
+        if method == 'q_learning':
+            target = r + gamma * np.where(d, 0.0, Q[ns].max(axis=1))
+        else: # sarsa
+            na = act(Q, ns, eps, rng)
+            target = r + gamma * np.where(d, 0.0, Q[ns, na])
+
+        idx = s * nA + a
+        cells, inverse = np.unique(idx, return_inverse=True)
+        delta = target - Qf[idx]
+        Qf[cells] += alpha * np.bincount(inverse, weights=delta) / np.bincount(inverse)
+
+        steps += num_envs
+        lengths += 1
+        totals += r
+        finished = d | (lengths >= max_steps)
+        s = ns
+        if finished.any():
+            returns.extend(totals[finished].tolist())
+            k = np.count_nonzero(finished)
+            s[finished] = np.searchsorted(isd_cdf, rng.random(k), side='right')
+            lengths[finished] = 0
+            totals[finished] = 0.0
+            if log_every is not None and len(returns) // log_every > (len(returns) - k) // log_every:
+                print('episodes: {0}, epsilon: {1:.3f}, mean return (last {2}): {3:.3f}, steps/sec: {4:.0f}'.format(
+                    len(returns), eps, log_every, np.mean(returns[-log_every:]), steps / (time.perf_counter() - t0)))
+        if method == 'sarsa':
+            a = np.where(finished, act(Q, s, eps, rng), na) # new episodes get a new action
+        else:
+            a = act(Q, s, eps, rng)
+
+    elapsed = time.perf_counter() - t0
+    nrow, ncol = env.nrow, env.ncol
+    layout = Model(None, None, (nrow, ncol), getattr(env, 'transposed', False))
+    return TrainResult(Q, to_map(layout, Q.argmax(axis=1)), steps, steps / elapsed, returns[:episodes])
+
+
+def q_learning(env, **kwargs):
+    """
+    Trains with Q-learning (off-policy: bootstraps on the greedy action), see train().
+    """
+    return train(env, method='q_learning', **kwargs)
+
+
+def sarsa(env, **kwargs):
+    """
+    Trains with SARSA (on-policy: bootstraps on the action taken next), see train().
+    """
+    return train(env, method='sarsa', **kwargs)
+
+
+def act(Q, states, epsilon, rng):
+    """
+    Epsilon-greedy actions, ties between greedy actions are broken at random.
+
+    return: one action per state (np.ndarray of int64)
+    """
+    q = Q[states]
+    best = q == q.max(axis=1, keepdims=True)
+    greedy = np.argmax(best * rng.random(q.shape), axis=1)
+    explore = rng.random(len(states)) < epsilon
+    return np.where(explore, rng.integers(Q.shape[1], size=len(states)), greedy)
@@ -2,5 +2,7 @@ from setuptools import setup
 
 setup(name='gym_csv',
       version='0.0.1',
-      install_requires=['gym','numpy','pygame']  # And any other dependencies needed
+      packages=['gym_csv', 'gym_csv.envs', 'tools'],
+      package_dir={'tools': '../tools'},  # map formats and drawing shared with the planners
+      install_requires=['gym','numpy','pygame','scipy']  # And any other dependencies needed
 )
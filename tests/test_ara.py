@@ -0,0 +1,49 @@
+import math
+import os
+import time
+
+import numpy as np
+
+from tools import alg_hub, ara
+from tools.utils import CharMap
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def walled_in_goal(n=600):
+    grid = np.ones((n, n), dtype=np.uint8)
+    grid[1:-1, 1:-1] = 0
+    grid[n - 4:n - 1, n - 4] = 1
+    grid[n - 4, n - 4:n - 1] = 1  # goal (n - 2, n - 2) enclosed
+    return grid
+
+
+def test_budget_bounds_unreachable_search():
+    grid = walled_in_goal()
+    map = CharMap(None, [1, 1], [598, 598], grid=grid)
+    t0 = time.perf_counter()
+    route, bound = ara.ara(map, time_budget_ms=20)
+    assert time.perf_counter() - t0 < 1.0
+    assert route is None and bound == math.inf
+
+
+def test_unreachable_without_budget():
+    grid = walled_in_goal(40)
+    route, bound = ara.ara(CharMap(None, [1, 1], [38, 38], grid=grid))
+    assert route is None and bound is None
+
+
+def test_get_route_returns_the_route_only():
+    route = alg_hub.get_route("map1", [2, 2], [7, 7], alg="ara")
+    assert route[0] == [2, 2] and len(route) - 1 == 10
+
+
+def test_batch_results_carry_the_bound(tmp_path):
+    np.savetxt(tmp_path / "walled.csv", walled_in_goal(), fmt="%d", delimiter=",")
+    walled = os.path.relpath(str(tmp_path / "walled"), ROOT)  # map names are relative to the root
+    results = alg_hub.get_routes("map1", [([2, 2], [7, 7]), ([2, 2], [0, 0])], alg="ara")
+    assert results[0].status == "ok" and results[0].bound == 1.0
+    assert results[1].status == "invalid"
+    result = alg_hub.get_routes(walled, [([1, 1], [598, 598])], alg="ara", time_budget_ms=20)[0]
+    assert result.status == "timeout" and result.route is None
+    assert alg_hub.get_routes("map1", [([2, 2], [7, 7])], alg="bfs")[0].bound is None
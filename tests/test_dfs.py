@@ -0,0 +1,38 @@
+import numpy as np
+
+from tools import dfs, bfs
+from tools.utils import CharMap
+
+
+def bordered(inner):
+    grid = np.ones((inner.shape[0] + 2, inner.shape[1] + 2), dtype=np.uint8)
+    grid[1:-1, 1:-1] = inner
+    return grid
+
+
+def test_enclosed_start():
+    grid = np.ones((5, 5), dtype=np.uint8)
+    grid[2, 2] = 0
+    grid[1, 1] = 0
+    map = CharMap(None, [2, 2], [1, 1], grid=grid)
+    assert dfs.dfs(map) == -1
+    assert len(map.nodes) == 0
+
+
+def test_enclosed_end():
+    inner = np.zeros((6, 6), dtype=np.uint8)
+    inner[3, :] = 1
+    map = CharMap(None, [1, 1], [6, 6], grid=bordered(inner))
+    assert dfs.dfs(map) == -1
+
+
+def test_reaches_the_same_goals_as_bfs():
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        grid = bordered((rng.random((12, 12)) < 0.35).astype(np.uint8))
+        start, end = [rng.integers(1, 13, 2).tolist() for _ in range(2)]
+        if start == end:
+            continue
+        grid[tuple(start)] = grid[tuple(end)] = 0
+        found = dfs.dfs(CharMap(None, start, end, grid=grid)) != -1
+        assert found == (bfs.bfs(CharMap(None, start, end, grid=grid)) != -1)
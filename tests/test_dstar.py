@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from tools.dstar import DStarLite
+from tools.utils import UserInputException, START, WALL
+
+
+def open_map(n=7):
+    grid = np.ones((n, n), dtype=np.uint8)
+    grid[1:-1, 1:-1] = 0
+    return grid
+
+
+def test_negative_cell_is_invalid():
+    map = DStarLite(None, [1, 1], [5, 5], grid=open_map())
+    grid = map.grid.copy()
+    with pytest.raises(UserInputException):
+        map.update_cells([(3, 1, WALL), (-3, 1, WALL)])
+    assert (map.grid == grid).all()
+    assert len(map.route()) - 1 == 8
+
+
+def test_invalid_code():
+    map = DStarLite(None, [1, 1], [5, 5], grid=open_map())
+    with pytest.raises(UserInputException):
+        map.update_cells([(3, 1, START)])
+
+
+def test_move_onto_wall_keeps_start():
+    map = DStarLite(None, [1, 1], [5, 5], grid=open_map())
+    with pytest.raises(UserInputException):
+        map.update_cells([], start=[0, 1])
+    assert map.grid[1, 1] == START
+    assert map.robot == (1, 1)
+
+
+def test_replans_around_new_wall():
+    map = DStarLite(None, [1, 1], [5, 5], grid=open_map())
+    route = map.update_cells([(x, 3, WALL) for x in range(1, 5)], start=[1, 2])
+    assert route[0] == [1, 2] and route[-1] == [5, 5]
+    assert len(route) - 1 == 7
@@ -0,0 +1,30 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from tools import heuristics
+from tools.heuristics import HEURISTICS, LazyField, ZeroField, heuristic_field
+
+
+def test_lazy_field_matches_dense_field():
+    goals = [(3, 4), (10, 1)]
+    for name in HEURISTICS:
+        dense = heuristic_field(name, (20, 20), goals)
+        lazy = heuristic_field(name, (20, 20), goals, lazy=True)
+        for x in range(20):
+            for y in range(20):
+                assert np.isclose(dense[x, y], lazy[x, y])
+
+
+def test_no_dense_field_for_zero_or_large_maps():
+    assert isinstance(heuristic_field("zero", (20, 20), [(1, 1)]), ZeroField)
+    assert isinstance(heuristic_field("manhattan", (5000, 5000), [(1, 1)]), LazyField)
+
+
+def test_field_cache_stays_under_budget(monkeypatch):
+    monkeypatch.setattr(heuristics, "FIELD_CACHE", OrderedDict())
+    monkeypatch.setattr(heuristics, "FIELD_CACHE_BYTES", 3 * 100 * 100 * 8)
+    fields = [heuristic_field("manhattan", (100, 100), [(i, i)]) for i in range(5)]
+    assert len(heuristics.FIELD_CACHE) == 3
+    assert heuristic_field("manhattan", (100, 100), [(4, 4)]) is fields[4]
+    assert heuristic_field("manhattan", (100, 100), [(0, 0)]) is not fields[0]
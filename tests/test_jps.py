@@ -0,0 +1,34 @@
+import numpy as np
+
+from bench.maps import GENERATORS, generate
+from tools import bfs, jps
+from tools.utils import CharMap, WALL, get_route
+
+
+def bfs_length(grid, start, end):
+    map = CharMap(None, start, end, grid=grid)
+    goalParentId = bfs.bfs(map)
+    if goalParentId == -1:
+        return None
+    return len(get_route(map, goalParentId))  # route to goal parent, plus the step to goal
+
+
+def test_route_lengths_match_bfs():
+    for kind in GENERATORS:
+        for n in (16, 48):
+            for seed in range(3):
+                grid, start, end = generate(kind, n, seed=seed)
+                route = jps.jps(CharMap(None, start, end, grid=grid))
+                assert route[0] == start and route[-1] == end
+                assert len(route) - 1 == bfs_length(grid, start, end), (kind, n, seed)
+                for a, b in zip(route, route[1:]):
+                    assert abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1
+                    assert grid[b[0], b[1]] != WALL
+
+
+def test_unreachable_end():
+    grid = np.ones((7, 7), dtype=np.uint8)
+    grid[1:3, 1:6] = 0
+    grid[4:6, 1:6] = 0
+    assert jps.jps(CharMap(None, [1, 1], [5, 5], grid=grid)) is None
+    assert bfs_length(grid, [1, 1], [5, 5]) is None
@@ -0,0 +1,32 @@
+import os
+
+from tools import astar, dijkstra, bfs
+from tools.utils import CharMap, SearchObserver
+
+MAP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "map1.csv")
+
+
+class CountObserver(SearchObserver):
+
+    def __init__(self):
+        self.pushes = 0
+
+    def on_push(self, map, node):
+        self.pushes += 1
+
+
+def test_cost_planners_report_pushes():
+    for map, search in ((astar.CharMapCost(MAP, [2, 2], [7, 7]), astar.astar),
+                        (dijkstra.CharMapCost(MAP, [2, 2], [7, 7]), dijkstra.dijkstra),
+                        (CharMap(MAP, [2, 2], [7, 7]), bfs.bfs)):
+        observer = CountObserver()
+        map.observer = observer
+        search(map)
+        assert observer.pushes == len(map.parents) - 1  # every node but the start
+
+
+def test_quiet_search_leaves_no_flags():
+    for map, search in ((astar.CharMapCost(MAP, [2, 2], [7, 7]), astar.astar),
+                        (dijkstra.CharMapCost(MAP, [2, 2], [7, 7]), dijkstra.dijkstra)):
+        search(map)
+        assert not map.is_new.any()
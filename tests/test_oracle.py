@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from tools import alg_hub
+from tools.oracle import RouteOracle
+from tools.utils import UserInputException, read_grid
+
+MAP = alg_hub.FILE_NAME.format("map1")
+
+
+def test_route_ends_at_goal():
+    route = RouteOracle(read_grid(MAP), [7, 7]).route([2, 2])
+    assert route[0] == [2, 2] and route[-1] == [7, 7]
+    assert len(route) - 1 == 10
+
+
+def test_negative_start_is_invalid():
+    route_oracle = RouteOracle(read_grid(MAP), [7, 7])
+    with pytest.raises(UserInputException):
+        route_oracle.route([-2, 2])
+    assert alg_hub.get_route("map1", [-2, 2], [7, 7], alg="oracle") == -1
+
+
+def test_out_of_range_start_is_invalid():
+    route_oracle = RouteOracle(read_grid(MAP), [7, 7])
+    with pytest.raises(UserInputException):
+        route_oracle.next_move([20, 2])
+    assert alg_hub.get_route("map1", [20, 2], [7, 7], alg="oracle") == -1
+
+
+def test_wall_start_is_invalid():
+    assert alg_hub.get_route("map1", [0, 0], [7, 7], alg="oracle") == -1
+
+
+def test_unreachable_goal():
+    grid = np.ones((5, 5), dtype=np.uint8)
+    grid[1, 1] = grid[3, 3] = 0
+    assert RouteOracle(grid, [3, 3]).route([1, 1]) is None
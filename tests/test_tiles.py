@@ -0,0 +1,19 @@
+import os
+from collections import OrderedDict
+
+from tools import alg_hub
+from tools.tiles import TiledGrid, write_tiles
+from tools.utils import read_grid
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def test_alg_hub_routes_on_tiled_map(tmp_path, monkeypatch):
+    write_tiles(read_grid(alg_hub.FILE_NAME.format("map1")), str(tmp_path / "tiled.tiles"), tile=4)
+    tiled = os.path.relpath(str(tmp_path / "tiled"), ROOT)  # map names are relative to the root
+    monkeypatch.setattr(alg_hub, "MAP_CACHE", OrderedDict())
+    monkeypatch.setattr(alg_hub, "MAP_CACHE_BYTES", 0)
+    for alg in ("astar", "bfs", "oracle", "hpa"):
+        route = alg_hub.get_route(tiled, [2, 2], [7, 7], alg=alg)
+        assert route == alg_hub.get_route("map1", [2, 2], [7, 7], alg=alg)
+    assert isinstance(alg_hub.load_grid(alg_hub.map_path(tiled)), TiledGrid)
@@ -1,103 +1,474 @@
 
 import sys
 import os
-from tools import astar, dijkstra, bfs, dfs
+import io
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stderr
+from itertools import repeat
+from tools import astar, dijkstra, bfs, dfs, oracle, bidirectional, jps, hpa, dstar, ara
+from tools.tiles import INDEX, TiledGrid
+from tools.utils import UserInputException, CharMap, as_cells, read_grid, resolve_map
 
 LOCAL_PATH = os.path.dirname(os.path.abspath(__file__))
 FILE_NAME = LOCAL_PATH + "/../{0}.csv"
+TILED_NAME = LOCAL_PATH + "/../{0}.tiles"  # tiled map directory (tools/tiles.py)
 
+MAP_CACHE_BYTES = 256 * 1024 * 1024  # memory budget of the parsed maps cache
+MAP_CACHE = OrderedDict()  # (path, mtime, size) -> grid, least recently used first
+ORACLE_CACHE_SIZE = 64  # route oracles kept
+ORACLE_CACHE = OrderedDict()  # (path, mtime, size, goal) -> oracle, least recently used first
+ABSTRACTION_CACHE_SIZE = 8  # HPA* abstract graphs kept
+ABSTRACTION_CACHE = OrderedDict()  # (path, mtime, size, cluster) -> abstraction, least recently used first
 
-def get_route_dfs(map_name, start, end):
+ALGORITHMS = ("astar", "dijkstra", "bfs", "dfs", "bibfs", "biastar", "jps", "oracle", "hpa", "ara")
+
+# Batch query result. status: ok, not_found (no route), timeout (ara, no route
+# within the time budget), invalid (bad map or positions) or error (unexpected
+# exception); error: message if not ok; bound: suboptimality bound of ara
+# routes, None for the other algorithms.
+RouteResult = namedtuple("RouteResult", ["route", "status", "error", "bound"], defaults=[None])
+
+
+def map_path(map_name):
+    """
+    Path to the map of a map name: its CSV file (replaced by the binary map
+    if there is any, utils.resolve_map), or its tiled map directory if there
+    is no CSV nor binary map.
+
+    map_name: map name (str)
+
+    return: path to map file or directory (str)
+    """
+    path = FILE_NAME.format(map_name)
+    tiled = TILED_NAME.format(map_name)
+    if not os.path.exists(resolve_map(path)) and os.path.isdir(tiled):
+        return tiled
+    return path
+
+
+def map_key(path):
+    """
+    Cache key of a map file: path, mtime and size. Binary maps replace CSV
+    ones (utils.resolve_map). Tiled maps are keyed by their index, which is
+    written again whenever the map is converted (tiles.write_tiles).
+    Raise exception if map file is not found.
+
+    path: path to map file or tiled map directory (str)
+
+    return: key (tuple)
+    """
+    path = os.path.abspath(resolve_map(path))
+    try:
+        stat = os.stat(os.path.join(path, INDEX) if os.path.isdir(path) else path)
+    except OSError:
+        print("[Error] Map not found.", file=sys.stderr)
+        raise UserInputException
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+def load_grid(path):
+    """
+    Returns the parsed grid of a map file. Grids are cached by path, mtime and
+    size, least recently used ones are evicted to keep the cache under
+    MAP_CACHE_BYTES.
+    Raise exception if map file is not found or invalid.
+
+    path: path to map file or tiled map directory (str)
+
+    return: cell codes, read-only, memory-mapped for binary maps (np.ndarray
+        of uint8), or TiledGrid for tiled maps (planners write their own copy)
+    """
+    key = map_key(path)
+    grid = MAP_CACHE.pop(key, None)
+    if grid is None:
+        for old in [k for k in MAP_CACHE if k[0] == key[0]]:  # file changed
+            del MAP_CACHE[old]
+        grid = read_grid(key[0])
+        if not isinstance(grid, TiledGrid):
+            grid.setflags(write=False)
+    MAP_CACHE[key] = grid
+    evict_grids(MAP_CACHE_BYTES)
+    return grid
+
+
+def evict_grids(budget):
+    """
+    Evicts least recently used grids until the cache fits in budget bytes.
+    The most recently used grid is always kept.
+
+    budget: cache memory budget (int)
+    """
+    size = sum(grid_bytes(grid) for grid in MAP_CACHE.values())
+    while size > budget and len(MAP_CACHE) > 1:
+        size -= grid_bytes(MAP_CACHE.popitem(last=False)[1])
+
+
+def grid_bytes(grid):
+    """
+    Memory taken by a cached grid: the whole array, or the resident tiles of
+    tiled maps.
+
+    grid: cell codes (np.ndarray or TiledGrid)
+
+    return: bytes (int)
+    """
+    if isinstance(grid, TiledGrid):
+        tiles = list(grid.tiles.values()) + list(grid.dirty.values())
+        return sum(tile.nbytes for tile in tiles)
+    return grid.nbytes
+
+
+def set_map_cache_budget(budget):
+    """
+    Changes the memory budget of the parsed maps cache.
+
+    budget: cache memory budget (int)
+    """
+    global MAP_CACHE_BYTES
+    MAP_CACHE_BYTES = budget
+    evict_grids(budget)
+
+
+def get_route_dfs(map_name, start, end, observer=None):
     """Execs python file dfs.py and returns the route optimized."""
     try:
-        map = dfs.CharMap(FILE_NAME.format(map_name), start, end)
+        path = map_path(map_name)
+        map = dfs.CharMap(path, start, end, grid=load_grid(path))
     except UserInputException:
-        print("[Error] Exiting..", file=stderr)
+        print("[Error] Exiting..", file=sys.stderr)
         return -1
 
-    sys.stdout = open(os.devnull, 'w')  # silence
+    map.observer = observer
     goalParentId = dfs.dfs(map)
-    route = dfs.get_route(map.nodes, goalParentId)
-    sys.stdout = sys.__stdout__  # back to standar verbosity
-
-    steps = []
-    for node in route:
-        steps.append([node.x, node.y])
-    steps.append(end)
+    if goalParentId == -1:
+        return None  # goal not found
+    steps = dfs.get_route(map, goalParentId)
+    steps.append(map.goal_found)
 
     return steps
 
 
-def get_route_bfs(map_name, start, end):
+def get_route_bfs(map_name, start, end, observer=None):
     """Execs python file bfs.py and returns the route optimized."""
     try:
-        map = bfs.CharMap(FILE_NAME.format(map_name), start, end)
+        path = map_path(map_name)
+        map = bfs.CharMap(path, start, end, grid=load_grid(path))
     except UserInputException:
-        print("[Error] Exiting..", file=stderr)
+        print("[Error] Exiting..", file=sys.stderr)
         return -1
 
-    sys.stdout = open(os.devnull, 'w')  # silence
+    map.observer = observer
     goalParentId = bfs.bfs(map)
-    route = bfs.get_route(map.nodes, goalParentId)
-    sys.stdout = sys.__stdout__  # back to standar verbosity
-
-    steps = []
-    for node in route:
-        steps.append([node.x, node.y])
-    steps.append(end)
+    if goalParentId == -1:
+        return None  # goal not found
+    steps = bfs.get_route(map, goalParentId)
+    steps.append(map.goal_found)
 
     return steps
 
 
-def get_route_dijkstra(map_name, start, end):
+def get_route_dijkstra(map_name, start, end, observer=None):
     """Execs python file dijkstra.py and returns the route optimized."""
     try:
-        map = dijkstra.CharMapCost(FILE_NAME.format(map_name), start, end)
+        path = map_path(map_name)
+        map = dijkstra.CharMapCost(path, start, end, grid=load_grid(path))
     except UserInputException:
-        print("[Error] Exiting..", file=stderr)
+        print("[Error] Exiting..", file=sys.stderr)
         return -1
 
-    sys.stdout = open(os.devnull, 'w')  # silence
+    map.observer = observer
     goalParentId = dijkstra.dijkstra(map)
-    route = dijkstra.get_route(map.closed_nodes, goalParentId)
-    sys.stdout = sys.__stdout__  # back to standar verbosity
-
-    steps = []
-    for node in route:
-        steps.append([node.x, node.y])
-    steps.append(end)
+    if goalParentId == -1:
+        return None  # goal not found
+    steps = dijkstra.get_route(map, goalParentId)
+    steps.append(map.goal_found)
 
     return steps
 
 
-def get_route_astar(map_name, start, end):
+def get_route_astar(map_name, start, end, observer=None, heuristic="manhattan"):
     """Execs python file astar.py and returns the route optimized."""
     try:
-        map = dijkstra.CharMapCost(FILE_NAME.format(map_name), start, end)
+        path = map_path(map_name)
+        map = astar.CharMapCost(path, start, end, grid=load_grid(path), heuristic=heuristic)
     except UserInputException:
-        print("[Error] Exiting..", file=stderr)
+        print("[Error] Exiting..", file=sys.stderr)
         return -1
 
-    sys.stdout = open(os.devnull, 'w')  # silence
+    map.observer = observer
     goalParentId = astar.astar(map)
-    route = astar.get_route(map.closed_nodes, goalParentId)
-    sys.stdout = sys.__stdout__  # back to standar verbosity
-
-    steps = []
-    for node in route:
-        steps.append([node.x, node.y])
-    steps.append(end)
+    if goalParentId == -1:
+        return None  # goal not found
+    steps = astar.get_route(map, goalParentId)
+    steps.append(map.goal_found)
 
     return steps
 
-def get_route(map_name, start, end, alg="astar"):
+def get_route_bibfs(map_name, start, end):
+    """Execs bidirectional BFS (bidirectional.py) and returns the route."""
+    try:
+        path = map_path(map_name)
+        map = CharMap(path, start, end, grid=load_grid(path))
+    except UserInputException:
+        print("[Error] Exiting..", file=sys.stderr)
+        return -1
+
+    return bidirectional.bibfs(map)
+
+
+def get_route_biastar(map_name, start, end):
+    """Execs bidirectional A* (bidirectional.py) and returns the route."""
+    try:
+        path = map_path(map_name)
+        map = CharMap(path, start, end, grid=load_grid(path))
+    except UserInputException:
+        print("[Error] Exiting..", file=sys.stderr)
+        return -1
+
+    return bidirectional.biastar(map)
+
+
+def get_route_jps(map_name, start, end):
+    """Execs python file jps.py and returns the route."""
+    try:
+        path = map_path(map_name)
+        map = CharMap(path, start, end, grid=load_grid(path))
+    except UserInputException:
+        print("[Error] Exiting..", file=sys.stderr)
+        return -1
+
+    return jps.jps(map)
+
+
+def get_route_ara(map_name, start, end, time_budget_ms=None):
+    """
+    Execs python file ara.py and returns the best route found in time and
+    its suboptimality bound: (route, bound), see ara.ara(); route is None
+    and bound None if the goal is unreachable, or infinite if the time ran out.
+    """
+    try:
+        path = map_path(map_name)
+        map = CharMap(path, start, end, grid=load_grid(path))
+    except UserInputException:
+        print("[Error] Exiting..", file=sys.stderr)
+        return -1
+
+    return ara.ara(map, time_budget_ms)
+
+
+def get_oracle(map_name, goal):
+    """
+    Returns the route oracle (distance field) of goal, cached per map and goal.
+    Raise exception if map or goal are invalid.
+
+    map_name: map name (str)
+    goal: goal position ([int, int]) or positions, routes lead to the nearest one ([[int, int], ...])
+
+    return: oracle answering distance, next_move and route queries (oracle.RouteOracle)
+    """
+    path = map_path(map_name)
+    key = map_key(path) + tuple(tuple(cell) for cell in as_cells(goal))
+    route_oracle = ORACLE_CACHE.pop(key, None)
+    if route_oracle is None:
+        route_oracle = oracle.RouteOracle(load_grid(path), goal)
+    ORACLE_CACHE[key] = route_oracle
+    while len(ORACLE_CACHE) > ORACLE_CACHE_SIZE:
+        ORACLE_CACHE.popitem(last=False)
+    return route_oracle
+
+
+def get_route_oracle(map_name, start, end):
+    """Answers the route with the cached distance field of end."""
+    try:
+        route_oracle = get_oracle(map_name, end)
+        return route_oracle.route(start)
+    except UserInputException:
+        print("[Error] Exiting..", file=sys.stderr)
+        return -1
+
+
+def get_abstraction(map_name, cluster=hpa.CLUSTER):
+    """
+    Returns the HPA* abstract graph of a map, cached per map and cluster side.
+    Raise exception if map is invalid.
+
+    map_name: map name (str)
+    cluster: cluster side (int)
+
+    return: abstract graph answering route queries (hpa.Abstraction)
+    """
+    path = map_path(map_name)
+    key = map_key(path) + (cluster,)
+    abstraction = ABSTRACTION_CACHE.pop(key, None)
+    if abstraction is None:
+        abstraction = hpa.Abstraction(load_grid(path), cluster)
+    ABSTRACTION_CACHE[key] = abstraction
+    while len(ABSTRACTION_CACHE) > ABSTRACTION_CACHE_SIZE:
+        ABSTRACTION_CACHE.popitem(last=False)
+    return abstraction
+
+
+def get_route_hpa(map_name, start, end, refine=True):
+    """Answers the route with the cached HPA* abstract graph of the map."""
+    try:
+        return get_abstraction(map_name).route(start, end, refine)
+    except UserInputException:
+        print("[Error] Exiting..", file=sys.stderr)
+        return -1
+
+
+def get_planner(map_name, start, end):
+    """
+    Returns an incremental (D* Lite) planner, already planned. Instead of new
+    get_route calls, map changes and robot moves are given to its
+    update_cells method, which repairs the route and returns it.
+    Raise exception if map, start or end are invalid.
+
+    map_name: map name (str)
+    start: start position ([int, int])
+    end: end position ([int, int]) or positions, routes lead to the nearest one ([[int, int], ...])
+
+    return: planner with its own copy of the map (dstar.DStarLite)
+    """
+    path = map_path(map_name)
+    return dstar.DStarLite(path, start, end, grid=load_grid(path))
+
+
+def get_route(map_name, start, end, alg="astar", observer=None, refine=True, time_budget_ms=None,
+              heuristic="manhattan"):
+    """
+    Returns the route from start to end found by alg.
+    Searches are quiet unless an observer (utils.SearchObserver) is given.
+    astar, dijkstra, bfs, dfs and oracle also accept several starts and/or
+    ends ([[int, int], ...]): the route found joins a start to the nearest end.
+    hpa routes are only refined from the abstract waypoints as asked by refine:
+    True for the whole route, False for none or the number of first steps (int).
+    ara returns the best route found within time_budget_ms (no limit if None),
+    None if none was found in time (see get_route_ara for its bound).
+    astar scores nodes with the given heuristic (see heuristics.HEURISTICS).
+    """
     if alg == "astar":
-        return get_route_astar(map_name, start, end)
+        return get_route_astar(map_name, start, end, observer, heuristic)
     elif alg == "dijkstra":
-        return get_route_dijkstra(map_name, start, end)
+        return get_route_dijkstra(map_name, start, end, observer)
     elif alg == "bfs":
-        return get_route_bfs(map_name, start, end)
+        return get_route_bfs(map_name, start, end, observer)
     elif alg == "dfs":
-        return get_route_dfs(map_name, start, end)
+        return get_route_dfs(map_name, start, end, observer)
+    elif alg == "bibfs":
+        return get_route_bibfs(map_name, start, end)
+    elif alg == "biastar":
+        return get_route_biastar(map_name, start, end)
+    elif alg == "jps":
+        return get_route_jps(map_name, start, end)
+    elif alg == "oracle":
+        return get_route_oracle(map_name, start, end)
+    elif alg == "hpa":
+        return get_route_hpa(map_name, start, end, refine)
+    elif alg == "ara":
+        result = get_route_ara(map_name, start, end, time_budget_ms)
+        return result if result == -1 else result[0]
     else:
         return None
+
+
+def get_nearest(map_name, start, goals, alg="bfs"):
+    """
+    Finds the goal nearest to start with one search.
+
+    map_name: map name (str)
+    start: start position ([int, int])
+    goals: goal positions ([[int, int], ...])
+    alg: astar, dijkstra, bfs or oracle (str)
+
+    return: nearest goal ([int, int]) and route to it ([[int, int], ...]), (None, None) if none is reachable
+    """
+    route = get_route(map_name, start, goals, alg=alg)
+    if route is None or route == -1:
+        return None, None
+    return route[-1], route
+
+
+def assign_nearest(map_name, sources, goals):
+    """
+    Assigns every source its nearest goal, using a single distance field
+    rooted at all goals (cached as a route oracle).
+
+    map_name: map name (str)
+    sources: source positions ([[int, int], ...])
+    goals: goal positions ([[int, int], ...])
+
+    return: nearest goal and route per source ([([int, int], [[int, int], ...]), ...]), (None, None) if unreachable
+    """
+    route_oracle = get_oracle(map_name, goals)
+    assignment = []
+    for source in sources:
+        route = route_oracle.route(source)
+        assignment.append((route[-1], route) if route is not None else (None, None))
+    return assignment
+
+
+def get_routes(map_name, queries, alg="astar", workers=None, time_budget_ms=None):
+    """
+    Answers many queries on the same map, spread over a pool of worker
+    processes that load the map once each.
+
+    map_name: map name (str)
+    queries: start and end of each route ([([int, int], [int, int]), ...])
+    alg: algorithm, one of ALGORITHMS (str)
+    workers: worker processes, None or 1 to run in this process (int)
+    time_budget_ms: time budget of each ara query in milliseconds, None for no limit (float)
+
+    return: one result per query, in order ([RouteResult, ...])
+    """
+    if alg not in ALGORITHMS:
+        raise ValueError("unknown algorithm: {0}".format(alg))
+    queries = list(queries)
+
+    if workers is None or workers <= 1:
+        init_worker(map_name)
+        return [solve_query(map_name, query, alg, time_budget_ms) for query in queries]
+
+    chunksize = max(1, len(queries) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(map_name,)) as executor:
+        return list(executor.map(solve_query, repeat(map_name), queries, repeat(alg),
+                                 repeat(time_budget_ms), chunksize=chunksize))
+
+
+def init_worker(map_name):
+    """Loads the map into the worker cache (errors are reported per query)."""
+    with redirect_stderr(io.StringIO()):
+        try:
+            load_grid(map_path(map_name))
+        except UserInputException:
+            pass
+
+
+def solve_query(map_name, query, alg, time_budget_ms=None):
+    """
+    Answers one query of get_routes.
+
+    return: result (RouteResult)
+    """
+    start, end = query
+    messages = io.StringIO()
+    bound = None
+    try:
+        with redirect_stderr(messages):
+            if alg == "ara":
+                route = get_route_ara(map_name, start, end, time_budget_ms)
+                if route != -1:
+                    route, bound = route
+            else:
+                route = get_route(map_name, start, end, alg=alg)
+    except Exception as e:
+        return RouteResult(None, "error", "{0}: {1}".format(type(e).__name__, e))
+    if route == -1:
+        return RouteResult(None, "invalid", messages.getvalue().strip())
+    if route is None and bound is not None:
+        return RouteResult(None, "timeout", "no route within {0} ms".format(time_budget_ms))
+    if route is None:
+        return RouteResult(None, "not_found", "goal not reachable")
+    return RouteResult(route, "ok", None, bound)
@@ -0,0 +1,225 @@
+#! /usr/bin/env python
+
+"""Implementation of Anytime Repairing A* (ARA*) algorithm.
+
+A first route is found quickly with weighted A* (heuristic inflated by
+epsilon), then epsilon is decreased and the search is repaired, reusing the
+distances already found, until the route is optimal or the time budget runs
+out. Every route comes with its suboptimality bound: it is at most bound
+times longer than the shortest one.
+"""
+
+import os
+import sys
+import argparse
+import time
+import heapq
+from itertools import count
+
+import numpy as np
+
+from tools.utils import UserInputException, CharMap, WALL, print_results
+
+__author__ = "Pedro Arias Perez"
+
+
+LOCAL_PATH = os.path.dirname(os.path.abspath(__file__))
+FILE_NAME = LOCAL_PATH + "/../{0}.csv"
+MAP = "map1"
+START_X = 2
+START_Y = 2
+END_X = 7
+END_Y = 7
+
+EPSILON = 3.0  # heuristic inflation of the first search
+STEP = 0.5  # epsilon decrease between searches
+CHECK_EVERY = 256  # expansions between deadline checks
+
+INF = float('inf')
+
+
+class AnytimeSearch:
+    """
+    ARA* search state: distances, parents and open nodes survive between
+    the searches of decreasing epsilon.
+    Walkable cells are a flat byte string padded with walls.
+    Cell index: (x + 1) * width + y + 1.
+    """
+
+    def __init__(self, grid, start, goal, epsilon=EPSILON):
+        self.width = grid.shape[1] + 2
+        self.free = np.pad(np.asarray(grid) != WALL, 1, constant_values=False).tobytes()
+        self.start = self.index(start)
+        self.goal = self.index(goal)
+        self.epsilon = epsilon
+        self.costs = {self.start: 0}
+        self.parents = {self.start: None}
+        self.opens = {}  # index -> f of its live heap entry
+        self.heap = []
+        self.closed = set()
+        self.incons = set()  # improved while closed, reopened at next search
+        self.counter = count()
+        self.n_expanded = 0
+        self.push(self.start)
+
+    def index(self, cell):
+        return (cell[0] + 1) * self.width + cell[1] + 1
+
+    def cell(self, i):
+        return [i // self.width - 1, i % self.width - 1]
+
+    def h(self, i):
+        """
+        Manhattan distance from cell i to goal.
+        """
+        w = self.width
+        return abs(i // w - self.goal // w) + abs(i % w - self.goal % w)
+
+    def push(self, i):
+        f = self.costs[i] + self.epsilon * self.h(i)
+        self.opens[i] = f
+        heapq.heappush(self.heap, (f, next(self.counter), i))
+
+    def improve(self, deadline=None):
+        """
+        Expands open nodes until the goal cost is within epsilon of optimal.
+
+        deadline: time.perf_counter() limit, None for no limit (float)
+
+        return: False if the deadline was reached first (bool)
+        """
+        w, free, costs = self.width, self.free, self.costs
+        while self.heap:
+            f, _, i = self.heap[0]
+            if self.opens.get(i) != f:  # stale entry
+                heapq.heappop(self.heap)
+                continue
+            if costs.get(self.goal, INF) <= f:
+                return True
+            if deadline is not None and self.n_expanded % CHECK_EVERY == 0 and time.perf_counter() > deadline:
+                return False
+            heapq.heappop(self.heap)
+            del self.opens[i]
+            self.closed.add(i)
+            self.n_expanded += 1
+            g = costs[i] + 1
+            for n in (i - w, i + w, i + 1, i - 1):
+                if free[n] and g < costs.get(n, INF):
+                    costs[n] = g
+                    self.parents[n] = i
+                    if n in self.closed:
+                        self.incons.add(n)
+                    else:
+                        self.push(n)
+        return True
+
+    def bound(self):
+        """
+        Suboptimality bound of the current route: epsilon, or less if the
+        open and inconsistent nodes prove it.
+        """
+        goal_cost = self.costs.get(self.goal, INF)
+        if goal_cost == INF:
+            return INF
+        lower = min([self.costs[i] + self.h(i) for i in list(self.opens) + list(self.incons)], default=goal_cost)
+        return min(self.epsilon, goal_cost / lower) if lower > 0 else 1.0
+
+    def route(self):
+        """
+        Current route, positions from start to goal ([[int, int], ...]), None if not found.
+        """
+        if self.goal not in self.costs:
+            return None
+        route = []
+        i = self.goal
+        while i is not None:
+            route.append(self.cell(i))
+            i = self.parents[i]
+        route.reverse()
+        return route
+
+    def decrease(self, step=STEP):
+        """
+        Lowers epsilon and reopens the inconsistent nodes for the next search.
+        """
+        self.epsilon = max(1.0, self.epsilon - step)
+        reopened = set(self.opens) | self.incons
+        self.opens = {}
+        self.heap = []
+        self.incons = set()
+        self.closed = set()
+        for i in reopened:
+            self.push(i)
+
+
+def ara(map, time_budget_ms=None, epsilon=EPSILON, step=STEP):
+    """
+    Executes Anytime Repairing A* Algorithm.
+    A first route is found with weighted A*, then routes are improved
+    until optimal; all within time_budget_ms.
+    Counts expanded cells at map.n_checked.
+
+    map: Map where to find the path, with start and end (CharMap).
+    time_budget_ms: time budget in milliseconds, None for no limit (float).
+    epsilon: heuristic inflation of the first search (float).
+    step: epsilon decrease between searches (float).
+
+    return: best route found, positions from start to end ([[int, int], ...]), None if not found;
+        and its suboptimality bound (float), None if the goal is unreachable or
+        infinite if time_budget_ms ran out before the first route was found.
+    """
+    t0 = time.perf_counter()
+    deadline = None if time_budget_ms is None else t0 + time_budget_ms / 1000.0
+    search = AnytimeSearch(map.grid, map.start, map.end, epsilon)
+    if not search.improve(deadline):
+        map.n_checked += search.n_expanded
+        return None, INF
+    route, bound = search.route(), search.bound()
+    while route is not None and bound > 1.0 and search.epsilon > 1.0:
+        search.decrease(step)
+        if not search.improve(deadline):
+            break
+        route, bound = search.route(), search.bound()
+    map.n_checked += search.n_expanded
+    if route is None:
+        return None, None
+    return route, bound
+
+
+def main(filename, start, end, time_budget_ms):
+    """
+    Entering method. Creates the map, execs the algorithm and prints the result.
+    Raise exception if map is invalid.
+
+    filename: map file name (str)
+    start: start point ([int, int])
+    end: end point ([int, int])
+    time_budget_ms: time budget in milliseconds, None for no limit (float)
+    """
+
+    try:
+        map = CharMap(filename, start, end)
+    except UserInputException:
+        print("[Error] Exiting..", file=sys.stderr)
+        return -1
+
+    map.dump()
+
+    t0 = time.time()
+    route, bound = ara(map, time_budget_ms)
+    tf = time.time()
+
+    print("Suboptimality bound: {0}".format(bound))
+    print_results([len(route) - 1 if route else 0, map.n_checked, round((tf-t0), 5)])
+
+
+if __name__ == "__main__":
+    # Command line argument parser, try: python3 ara.py -h
+    parser = argparse.ArgumentParser(description="Anytime Repairing A* Algorithm.")
+    parser.add_argument('-m', '--map', metavar='MAP', dest='map', default=MAP, help='change map folder')
+    parser.add_argument('-s', '--start', type=int, nargs=2, metavar='N', dest='start', default=[START_X, START_Y], help='change start point')
+    parser.add_argument('-e', '--end', type=int, nargs=2, metavar='N', dest='end', default=[END_X, END_Y], help='change end point')
+    parser.add_argument('-t', '--time', type=float, metavar='MS', dest='time', default=None, help='time budget in milliseconds')
+    args = parser.parse_args()
+
+    main(FILE_NAME.format(args.map), args.start, args.end, args.time)
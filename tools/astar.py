@@ -10,12 +10,13 @@ import os
 import sys
 import argparse
 import time
-from math import sqrt
-from operator import attrgetter
 
 #sys.path.append('../')
 from tools.utils import Output, OUTPUT_MODE, UserInputException, Colors, CharMapCell,\
-                    CharMap, Node, get_route, print_results
+                    CharMap, Node, DumpObserver, OpenList, as_cells, replace_cells, get_route, print_results,\
+                    EMPTY, WALL, VISITED, START, END
+from tools.heuristics import HEURISTICS, heuristic_field
+from tools.tiles import TiledGrid
 
 __author__ = "Pedro Arias Perez"
 
@@ -31,48 +32,55 @@ END_Y = 2
 
 class NodeCost(Node):
     """
-    Extends Node class with cost attribute
+    Extends Node class with cost attributes: path cost from start (g) and
+    priority in the open nodes (cost = g + heuristic).
     """
-    def __init__(self, x, y, myId, parentId, cost):
+    def __init__(self, x, y, myId, parentId, cost, g=0):
         self.x = x
         self.y = y
         self.myId = myId
         self.parentId = parentId
         self.cost = cost
+        self.g = g
 
     def dump(self):
         """
         Prints node.
         """
         print("---------- x", str(self.x), "| y", str(self.y), "| id",\
-              str(self.myId), "| parentId", str(self.parentId), "| cost", str(self.cost))
-
-
-def euclidean_dist(current, goal):
-    """
-    Euclidean distance between two points.
-
-    current: current point ([int, int])
-    goal: second point ([int, int])
-
-    return: distance between points (float)
-    """
-    return sqrt((current[0] - goal[0])**2 + (current[1] - goal[1])**2)
+              str(self.myId), "| parentId", str(self.parentId), "| g", str(self.g), "| cost", str(self.cost))
 
 
 class CharMapCost(CharMap):
     """
     A map that represents the C-Space.
+    Open nodes are scored with path cost plus heuristic to the nearest end,
+    precomputed for the whole grid, or per cell on large and tiled maps
+    (heuristics.heuristic_field).
     """
 
-    def __init__(self, filename, start=None, end=None):
-        self.charMap = []
-        self.nodes = []  # to visit
+    def __init__(self, filename, start=None, end=None, grid=None, heuristic="manhattan"):
+        if heuristic not in HEURISTICS:
+            print("[Error] Invalid heuristic.", file=sys.stderr)
+            raise UserInputException
+        self.heuristic = heuristic
+        self.h = None  # heuristic per cell, set with end
+        self.grid = None
+        self.nodes = OpenList()  # to visit
         self.closed_nodes = []  # visited
+        self.coords = []  # node positions, indexed by node id
+        self.parents = []  # node parent ids, indexed by node id
         self.n_checked = 0
+        self.n_expanded = 0
+        self.goal_found = None  # end reached by the search
         self.aux = None
+        self.observer = None  # search tracing hooks (SearchObserver)
+        self.renderer = None  # live drawing (TerminalRenderer)
 
-        self.read(filename)
+        if grid is None:
+            self.read(filename)
+        else:
+            self.load(grid)
         self.start = start
         self.end = end
 
@@ -86,20 +94,44 @@ class CharMapCost(CharMap):
         Start setter. Also adds start position as root in nodes tree.
         Raise exception if s position is non-existent or occupied.
 
-        s: start position ([int, int])
+        s: start position ([int, int]) or positions for a multi-source search ([[int, int], ...])
         """
-        if s is not None:
-            if self.charMap[s[0]][s[1]].c == "1":  # wall
-                print("[Error] Invalid start position.", file=sys.stderr)
-                raise UserInputException
+        self.starts = as_cells(s)
+        for c in self.starts:
             try:
-                self.charMap[s[0]][s[1]] = CharMapCell(3)
+                if self.grid[c[0], c[1]] == WALL:
+                    print("[Error] Invalid start position.", file=sys.stderr)
+                    raise UserInputException
+                self.grid[c[0], c[1]] = START
             except IndexError:
                 print("[Error] Invalid start position.", file=sys.stderr)
                 raise UserInputException
-            self.nodes.append(NodeCost(s[0], s[1], 0, -2, 0))
+            node = NodeCost(c[0], c[1], len(self.parents), -2, 0)
+            self.add_to_tree(node)
+            self.nodes.append(node)
         self.__start = s
 
+    @property
+    def end(self):
+        return CharMap.end.fget(self)
+
+    @end.setter
+    def end(self, e):
+        """
+        End setter. Also precomputes the heuristic and scores the open nodes with it.
+        Raise exception if e position is non-existent or occupied.
+
+        e: end position ([int, int]) or positions for a nearest-goal search ([[int, int], ...])
+        """
+        CharMap.end.fset(self, e)
+        self.h = heuristic_field(self.heuristic, self.grid.shape, self.ends,
+                                 lazy=isinstance(self.grid, TiledGrid))
+        opens = list(self.nodes)
+        self.nodes = OpenList()
+        for node in opens:
+            node.cost = node.g + self.h[node.x, node.y]
+            self.nodes.append(node)
+
     def check(self, cell, node):
         """
         Check if cell is end or not visited and add it to tree nodes.
@@ -111,29 +143,39 @@ class CharMapCost(CharMap):
         """
 
         self.n_checked += 1
-        if( self.charMap[cell[0]][cell[1]] == '4' ):  # end
+        code = self.grid[cell[0], cell[1]]
+        if code == END:
+            self.goal_found = [cell[0], cell[1]]
             return node.myId
-        elif ( self.charMap[cell[0]][cell[1]] == '0' ):  # empty
-            newNode = NodeCost(cell[0], cell[1], len(self.nodes)+len(self.closed_nodes), node.myId,
-                        euclidean_dist(cell, self.start)+euclidean_dist(cell, self.end))
-            self.charMap[cell[0]][cell[1]] = CharMapCell(2)
+        g = node.g + 1
+        opened = self.nodes.get(cell) if code == VISITED else None
+        if code == EMPTY or (opened is not None and g < opened.g):
+            # new cell, or open cell reached by a shorter path (supersedes its node)
+            newNode = NodeCost(cell[0], cell[1], len(self.parents), node.myId,
+                        g + self.h[cell[0], cell[1]], g)
+            self.grid[cell[0], cell[1]] = VISITED
+            self.add_to_tree(newNode)
             self.nodes.append(newNode)
+            if self.observer is not None:
+                self.observer.on_push(self, newNode)
         return -1
 
     def reset(self):
         """
         Set all cells as not visited, clear tree nodes and reser checked cells counter.
         """
-        self.nodes = []
+        self.nodes = OpenList()
         self.closed_nodes = []
+        self.coords = []
+        self.parents = []
         self.start = self.start
         self.end = self.end
 
-        for row in self.charMap:
-            for c in row:
-                if c == "2":
-                    c.c = "0"
+        replace_cells(self.grid, VISITED, EMPTY)
+        self.is_new.fill(False)
         self.n_checked = 0
+        self.n_expanded = 0
+        self.goal_found = None
 
 def read_from_user(m, s, e):
     """
@@ -212,25 +254,21 @@ def astar(map):
     """
 
     goalParentId = -1
+    observer = map.observer
 
     while len(map.nodes):
-        print("--------------------- number of open nodes: ", len(map.nodes))
-        print("--------------------- number of closed nodes: ", len(map.closed_nodes))
-
-        node = min(map.nodes, key=attrgetter('cost'))
-
+        node = map.nodes.pop()
         map.closed_nodes.append(node)
-        map.nodes.remove(node)
-
-        map.set_current([node.x, node.y])
-        map.clear_news()
-        node.dump()
+        map.n_expanded += 1
+        if observer is not None:
+            observer.on_expand(map, node)
 
         # up
         tmpX = node.x - 1
         tmpY = node.y
         if map.check([tmpX, tmpY], node) != -1:
-            map.dump()
+            if observer is not None:
+                observer.on_goal(map, node)
             goalParentId = node.myId
             break
 
@@ -238,7 +276,8 @@ def astar(map):
         tmpX = node.x + 1
         tmpY = node.y
         if map.check([tmpX, tmpY], node) != -1:
-            map.dump()
+            if observer is not None:
+                observer.on_goal(map, node)
             goalParentId = node.myId
             break
 
@@ -246,7 +285,8 @@ def astar(map):
         tmpX = node.x
         tmpY = node.y + 1
         if map.check([tmpX, tmpY], node) != -1:
-            map.dump()
+            if observer is not None:
+                observer.on_goal(map, node)
             goalParentId = node.myId
             break
 
@@ -254,15 +294,17 @@ def astar(map):
         tmpX = node.x
         tmpY = node.y - 1
         if map.check([tmpX, tmpY], node) != -1:
-            map.dump()
+            if observer is not None:
+                observer.on_goal(map, node)
             goalParentId = node.myId
             break
 
-        map.dump()
+        if observer is not None:
+            observer.on_close(map, node)
     return goalParentId
 
 
-def main(filename, start, end):
+def main(filename, start, end, heuristic="manhattan"):
     """
     Entering method. Creates the map, execs the algorithm and prints the result.
     Raise exception if map is invalid.
@@ -270,22 +312,26 @@ def main(filename, start, end):
     filename: map file name (str)
     start: start point ([int, int])
     end: end point ([int, int])
+    heuristic: one of heuristics.HEURISTICS (str)
     """
 
     try:
-        map = CharMapCost(filename, start, end)
+        map = CharMapCost(filename, start, end, heuristic=heuristic)
     except UserInputException:
-        print("[Error] Exiting..", file=stderr)
+        print("[Error] Exiting..", file=sys.stderr)
         return -1
 
     map.dump()
+    if OUTPUT_MODE != Output.NONE:
+        map.observer = DumpObserver()
 
     t0 = time.time()
     goalParentId = astar(map)
-    route = get_route(map.closed_nodes, goalParentId)
+    route = get_route(map, goalParentId)
     tf = time.time()
 
     print_results([len(route), map.n_checked, round((tf-t0), 5)])
+    print("Expanded nodes: {0}".format(map.n_expanded))
 
 
 if __name__ == "__main__":
@@ -296,6 +342,7 @@ if __name__ == "__main__":
     parser.add_argument('-e', '--end', type=int, nargs=2, metavar='N', dest='end', default=[END_X, END_Y], help='change end point')
     parser.add_argument('-i', action='store_true', help='interactive mode (choose map, start, end...)')
     parser.add_argument('-o', type=Output, choices=Output, metavar='OUTPUT', dest='output', default=OUTPUT_MODE, help='output mode (choose from none, base, colored)')
+    parser.add_argument('-H', '--heuristic', choices=sorted(HEURISTICS), dest='heuristic', default="manhattan", help='heuristic (default: manhattan)')
     args = parser.parse_args()
 
     map = args.map
@@ -308,4 +355,4 @@ if __name__ == "__main__":
         map, start, end = read_from_user(map, start, end)
 
     if map is not None and start is not None and end is not None:
-        main(FILE_NAME.format(map), start, end)
+        main(FILE_NAME.format(map), start, end, args.heuristic)
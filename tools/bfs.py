@@ -13,7 +13,7 @@ import time
 
 #sys.path.append('../')
 from tools.utils import Output, OUTPUT_MODE, UserInputException, Colors, CharMapCell,\
-                    CharMap, Node, get_route, print_results
+                    CharMap, Node, DumpObserver, get_route, print_results
 
 __author__ = "Pedro Arias Perez"
 
@@ -105,18 +105,18 @@ def bfs(map):
 
     done = False
     goalParentId = -1
+    observer = map.observer
     while not done:
-        print("--------------------- number of nodes: ", len(map.nodes))
-        for node in map.nodes:
-            map.set_current([node.x, node.y])
-            map.clear_news()
-            node.dump()
+        for node in map.nodes:  # new nodes are appended while iterating
+            if observer is not None:
+                observer.on_expand(map, node)
 
             # up
             tmpX = node.x - 1
             tmpY = node.y
             if map.check([tmpX, tmpY], node) != -1:
-                map.dump()
+                if observer is not None:
+                    observer.on_goal(map, node)
                 done = True
                 goalParentId = node.myId
                 break
@@ -125,7 +125,8 @@ def bfs(map):
             tmpX = node.x + 1
             tmpY = node.y
             if map.check([tmpX, tmpY], node) != -1:
-                map.dump()
+                if observer is not None:
+                    observer.on_goal(map, node)
                 done = True
                 goalParentId = node.myId
                 break
@@ -134,7 +135,8 @@ def bfs(map):
             tmpX = node.x
             tmpY = node.y + 1
             if map.check([tmpX, tmpY], node) != -1:
-                map.dump()
+                if observer is not None:
+                    observer.on_goal(map, node)
                 done = True
                 goalParentId = node.myId
                 break
@@ -143,12 +145,16 @@ def bfs(map):
             tmpX = node.x
             tmpY = node.y - 1
             if map.check([tmpX, tmpY], node) != -1:
-                map.dump()
+                if observer is not None:
+                    observer.on_goal(map, node)
                 done = True
                 goalParentId = node.myId
                 break
 
-            map.dump()
+            if observer is not None:
+                observer.on_close(map, node)
+        else:
+            done = True  # every reachable cell checked, goal not found
     return goalParentId
 
 
@@ -169,10 +175,12 @@ def main(filename, start, end):
         return -1
 
     map.dump()
+    if OUTPUT_MODE != Output.NONE:
+        map.observer = DumpObserver()
 
     t0 = time.time()
     goalParentId = bfs(map)
-    route = get_route(map.nodes, goalParentId)
+    route = get_route(map, goalParentId)
     tf = time.time()
 
     print_results([len(route), map.n_checked, round((tf-t0), 5)])
@@ -0,0 +1,205 @@
+#! /usr/bin/env python
+
+"""Implementation of bidirectional Breadth First Search and A* algorithms.
+
+Both searches grow a frontier from the start and another one from the end,
+and stop when they meet, so the explored area grows with the route length
+instead of its square on open maps.
+"""
+
+import os
+import sys
+import argparse
+import time
+import heapq
+
+from tools.utils import UserInputException, CharMap, WALL, print_results
+
+__author__ = "Pedro Arias Perez"
+
+
+LOCAL_PATH = os.path.dirname(os.path.abspath(__file__))
+FILE_NAME = LOCAL_PATH + "/../{0}.csv"
+MAP = "map1"
+START_X = 2
+START_Y = 2
+END_X = 7
+END_Y = 7
+
+# up, down, right, left (same order as the planners)
+MOVES = ((-1, 0), (1, 0), (0, 1), (0, -1))
+
+
+def neighbours(map, cell):
+    """
+    Free cells next to cell. Counts them as checked.
+
+    map: map where to find the path (CharMap)
+    cell: current cell ((int, int))
+
+    return: free neighbours ([(int, int), ...])
+    """
+    nrow, ncol = map.grid.shape
+    free = []
+    for dx, dy in MOVES:
+        x, y = cell[0] + dx, cell[1] + dy
+        if 0 <= x < nrow and 0 <= y < ncol:
+            map.n_checked += 1
+            if map.grid[x, y] != WALL:
+                free.append((x, y))
+    return free
+
+
+def join(forward, backward, meet):
+    """
+    Joins both search trees at meeting cell.
+
+    forward: parent of each cell reached from start ({(int, int): (int, int)})
+    backward: parent of each cell reached from end ({(int, int): (int, int)})
+    meet: cell reached by both searches ((int, int))
+
+    return: route, positions from start to end ([[int, int], ...])
+    """
+    route = []
+    cell = meet
+    while cell is not None:
+        route.append([cell[0], cell[1]])
+        cell = forward[cell]
+    route.reverse()
+    cell = backward[meet]
+    while cell is not None:
+        route.append([cell[0], cell[1]])
+        cell = backward[cell]
+    return route
+
+
+def bibfs(map):
+    """
+    Executes bidirectional Breadth First Search Algorithm.
+    The smaller frontier is expanded a whole level at a time, the shortest
+    route through the cells where both searches meet at that level is taken.
+
+    map: Map where to find the path, with start and end (CharMap).
+
+    return: route, positions from start to end ([[int, int], ...]), None if not found.
+    """
+    start, end = tuple(map.start), tuple(map.end)
+    if start == end:
+        return [list(start)]
+
+    trees = [{start: None}, {end: None}]  # parents: forward, backward
+    depths = [{start: 0}, {end: 0}]
+    frontiers = [[start], [end]]
+
+    while frontiers[0] and frontiers[1]:
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        tree, depth, other = trees[side], depths[side], depths[1 - side]
+        best, meet = None, None
+        level = []
+        for cell in frontiers[side]:
+            for n in neighbours(map, cell):
+                if n in depth:
+                    continue
+                tree[n] = cell
+                depth[n] = depth[cell] + 1
+                level.append(n)
+                if n in other and (best is None or depth[n] + other[n] < best):
+                    best, meet = depth[n] + other[n], n
+        frontiers[side] = level
+        if meet is not None:
+            return join(trees[0], trees[1], meet)
+    return None
+
+
+def biastar(map):
+    """
+    Executes bidirectional A* Algorithm (Manhattan distance heuristic).
+    The side with fewer open nodes is expanded. Search stops when the lowest
+    f = g + h of a side can not improve the best route found.
+
+    map: Map where to find the path, with start and end (CharMap).
+
+    return: route, positions from start to end ([[int, int], ...]), None if not found.
+    """
+    start, end = tuple(map.start), tuple(map.end)
+    if start == end:
+        return [list(start)]
+
+    targets = [end, start]  # heuristic goal of each side
+    trees = [{start: None}, {end: None}]
+    costs = [{start: 0}, {end: 0}]
+    closed = [set(), set()]
+    opens = [[(manhattan(start, end), 0, start)], [(manhattan(end, start), 0, end)]]
+    best, meet = float('inf'), None
+
+    while opens[0] and opens[1]:
+        if max(opens[0][0][0], opens[1][0][0]) >= best:
+            break
+        side = 0 if len(opens[0]) <= len(opens[1]) else 1
+        f, g, cell = heapq.heappop(opens[side])
+        if cell in closed[side] or g > costs[side][cell]:  # stale entry
+            continue
+        closed[side].add(cell)
+        tree, cost, other = trees[side], costs[side], costs[1 - side]
+        for n in neighbours(map, cell):
+            new_g = g + 1
+            if new_g < cost.get(n, float('inf')):
+                cost[n] = new_g
+                tree[n] = cell
+                heapq.heappush(opens[side], (new_g + manhattan(n, targets[side]), new_g, n))
+                if n in other and new_g + other[n] < best:
+                    best, meet = new_g + other[n], n
+
+    if meet is None:
+        return None
+    return join(trees[0], trees[1], meet)
+
+
+def manhattan(current, goal):
+    """
+    Manhattan distance between two points.
+
+    current: current point ([int, int])
+    goal: second point ([int, int])
+
+    return: distance between points (int)
+    """
+    return abs(current[0] - goal[0]) + abs(current[1] - goal[1])
+
+
+def main(filename, start, end, alg):
+    """
+    Entering method. Creates the map, execs the algorithm and prints the result.
+    Raise exception if map is invalid.
+
+    filename: map file name (str)
+    start: start point ([int, int])
+    end: end point ([int, int])
+    alg: bibfs or biastar (str)
+    """
+
+    try:
+        map = CharMap(filename, start, end)
+    except UserInputException:
+        print("[Error] Exiting..", file=sys.stderr)
+        return -1
+
+    map.dump()
+
+    t0 = time.time()
+    route = bibfs(map) if alg == "bibfs" else biastar(map)
+    tf = time.time()
+
+    print_results([len(route) - 1 if route else 0, map.n_checked, round((tf-t0), 5)])
+
+
+if __name__ == "__main__":
+    # Command line argument parser, try: python3 bidirectional.py -h
+    parser = argparse.ArgumentParser(description="Bidirectional BFS and A* Algorithms.")
+    parser.add_argument('-m', '--map', metavar='MAP', dest='map', default=MAP, help='change map folder')
+    parser.add_argument('-s', '--start', type=int, nargs=2, metavar='N', dest='start', default=[START_X, START_Y], help='change start point')
+    parser.add_argument('-e', '--end', type=int, nargs=2, metavar='N', dest='end', default=[END_X, END_Y], help='change end point')
+    parser.add_argument('-a', '--alg', choices=['bibfs', 'biastar'], dest='alg', default='biastar', help='algorithm')
+    args = parser.parse_args()
+
+    main(FILE_NAME.format(args.map), args.start, args.end, args.alg)
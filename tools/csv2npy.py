@@ -0,0 +1,52 @@
+#! /usr/bin/env python
+
+"""Converts CSV maps to the binary map format.
+
+Binary maps are .npy files holding a 2D uint8 array of cell codes (a small
+header plus the raw cells), so they are memory-mapped instead of parsed. A
+binary map next to a CSV one with the same name, and not older than it, is
+used instead of the CSV by CharMap, alg_hub and the gym_csv environments.
+"""
+
+import os
+import sys
+import argparse
+
+import numpy as np
+
+from tools.utils import UserInputException, read_grid
+
+__author__ = "Pedro Arias Perez"
+
+
+def convert(filename, output=None):
+    """
+    Converts a CSV map to a binary map.
+    Raise exception if map file is not found or invalid.
+
+    filename: path to CSV map (str)
+    output: path to binary map, same name with .npy extension if None (str)
+
+    return: path to binary map (str)
+    """
+    if output is None:
+        output = os.path.splitext(filename)[0] + ".npy"
+    grid = read_grid(filename, resolve=False)
+    np.save(output, np.ascontiguousarray(grid, dtype=np.uint8))
+    return output
+
+
+if __name__ == "__main__":
+    # Command line argument parser, try: python3 -m tools.csv2npy -h
+    parser = argparse.ArgumentParser(description="Converts CSV maps to binary (.npy) maps.")
+    parser.add_argument('maps', nargs='+', metavar='MAP', help='CSV map files')
+    parser.add_argument('-o', '--output', metavar='FILE', help='output file (only with one map)')
+    args = parser.parse_args()
+
+    if args.output is not None and len(args.maps) > 1:
+        parser.error("-o can only be used with one map")
+    for filename in args.maps:
+        try:
+            print(convert(filename, args.output))
+        except UserInputException:
+            print("[Error] Skipping {0}.".format(filename), file=sys.stderr)
@@ -14,7 +14,7 @@ import time
 
 #sys.path.append('../')
 from tools.utils import Output, OUTPUT_MODE, UserInputException, Colors, CharMapCell,\
-                    CharMap, Node, get_route, print_results
+                    CharMap, Node, DumpObserver, get_route, print_results
 
 __author__ = "Pedro Arias Perez"
 
@@ -124,30 +124,34 @@ def dfs(map, is_clockwise=True):
         directions = cycle([[-1, 0], [0, -1], [1, 0], [0, 1]])  # up, left, down, right, up, left...
     current_direction = next(directions)
 
-    done = False
     goalParentId = -1
-    first_direction = None
-    ("--------------------- number of nodes: ", len(map.nodes))
+    failed = {}  # node id -> directions that added no new node
+    observer = map.observer
 
-    while True:
-        map.clear_news()
+    while len(map.nodes):
         node = map.nodes[-1]
-        map.set_current([node.x, node.y])
+        if observer is not None:
+            observer.on_expand(map, node)
 
         tmpX = node.x + current_direction[0]
         tmpY = node.y + current_direction[1]
         if map.check([tmpX, tmpY], node) != -1:
-            map.dump()
+            if observer is not None:
+                observer.on_goal(map, node)
             goalParentId = node.myId
             break
 
         if node == map.nodes[-1]:
+            # no new node: cells never become empty again, so the node is
+            # done once every direction has failed
+            tried = failed.setdefault(node.myId, set())
+            tried.add(tuple(current_direction))
             current_direction = next(directions)
-            if current_direction == first_direction:
+            if len(tried) == 4:
                 map.nodes.pop()
-        else:
-            first_direction = current_direction
-            map.dump()
+                del failed[node.myId]
+        elif observer is not None:
+            observer.on_close(map, node)
     return goalParentId
 
 
@@ -164,14 +168,16 @@ def main(filename, start, end, is_clockwise):
     try:
         map = CharMap(filename, start, end)
     except UserInputException:
-        print("[Error] Exiting..", file=stderr)
+        print("[Error] Exiting..", file=sys.stderr)
         return -1
 
     map.dump()
+    if OUTPUT_MODE != Output.NONE:
+        map.observer = DumpObserver()
 
     t0 = time.time()
     goalParentId = dfs(map, is_clockwise)
-    route = get_route(map.nodes, goalParentId)
+    route = get_route(map, goalParentId)
     tf = time.time()
 
     print_results([len(route), map.n_checked, round((tf-t0), 5)])
@@ -0,0 +1,270 @@
+#! /usr/bin/env python
+
+"""Implementation of D* Lite algorithm (incremental replanning).
+
+The search runs backwards, from the end to the robot, and keeps its state
+(g and rhs values and the open nodes) between queries. When cells change or
+the robot moves, only the cells whose distance to the end changed are
+expanded again, so replanning costs grow with the size of the change instead
+of the size of the map.
+"""
+
+import os
+import sys
+import argparse
+import time
+import heapq
+from itertools import count
+
+from tools.utils import UserInputException, CharMap, print_results, EMPTY, WALL, START, END
+
+__author__ = "Pedro Arias Perez"
+
+
+LOCAL_PATH = os.path.dirname(os.path.abspath(__file__))
+FILE_NAME = LOCAL_PATH + "/../{0}.csv"
+MAP = "map1"
+START_X = 2
+START_Y = 2
+END_X = 7
+END_Y = 7
+
+INF = float('inf')
+
+# up, down, right, left (same order as the planners)
+MOVES = ((-1, 0), (1, 0), (0, 1), (0, -1))
+
+
+class DStarLite(CharMap):
+    """
+    A map that keeps a D* Lite search to its end(s) across queries.
+    The route is planned on construction and repaired by update_cells().
+    Counts expanded cells at n_checked.
+    """
+
+    def __init__(self, filename, start=None, end=None, grid=None):
+        super(DStarLite, self).__init__(filename, start, end, grid)
+        self.robot = tuple(self.starts[0])
+        self.last = self.robot  # robot position when keys were last shifted
+        self.goals = set(tuple(c) for c in self.ends)
+        self.km = 0  # key modifier, sum of the robot moves
+        self.g = {}  # cell -> distance to end
+        self.rhs = {}  # cell -> one step lookahead distance to end
+        self.queue = []  # heap of (key, key, counter, cell), with lazy deletion
+        self.queued = {}  # cell -> key of its live entry
+        self.counter = count()
+
+        for goal in self.goals:
+            self.rhs[goal] = 0
+            self.push(goal)
+        self.compute()
+
+    def neighbours(self, cell):
+        """
+        Cells next to cell, inside the map.
+        """
+        nrow, ncol = self.grid.shape
+        return [(cell[0] + dx, cell[1] + dy) for dx, dy in MOVES
+                if 0 <= cell[0] + dx < nrow and 0 <= cell[1] + dy < ncol]
+
+    def cost(self, a, b):
+        """
+        Cost of moving between neighbour cells: 1, infinite if any is a wall.
+        """
+        return INF if self.grid[a] == WALL or self.grid[b] == WALL else 1
+
+    def key(self, cell):
+        """
+        Priority of cell in the open nodes.
+        """
+        m = min(self.g.get(cell, INF), self.rhs.get(cell, INF))
+        return (m + abs(cell[0] - self.robot[0]) + abs(cell[1] - self.robot[1]) + self.km, m)
+
+    def push(self, cell):
+        """
+        Adds cell to the open nodes, superseding its old entry if any.
+        """
+        key = self.key(cell)
+        self.queued[cell] = key
+        heapq.heappush(self.queue, (key[0], key[1], next(self.counter), cell))
+
+    def top(self):
+        """
+        Open node with the lowest key, stale entries are dropped.
+
+        return: key ((float, float)) and cell ((int, int)), None if there are no open nodes
+        """
+        while self.queue:
+            k1, k2, _, cell = self.queue[0]
+            if self.queued.get(cell) == (k1, k2):
+                return (k1, k2), cell
+            heapq.heappop(self.queue)
+        return (INF, INF), None
+
+    def update_vertex(self, cell):
+        """
+        Recomputes the lookahead distance of cell and reopens it if inconsistent.
+        """
+        if cell in self.goals and self.grid[cell] != WALL:
+            self.rhs[cell] = 0
+        else:
+            self.rhs[cell] = min([self.cost(cell, n) + self.g.get(n, INF) for n in self.neighbours(cell)],
+                                 default=INF)
+        self.queued.pop(cell, None)
+        if self.g.get(cell, INF) != self.rhs[cell]:
+            self.push(cell)
+
+    def compute(self):
+        """
+        Expands open nodes until the distance from the robot is consistent.
+        """
+        while True:
+            key, cell = self.top()
+            robot = self.robot
+            if cell is None or (key >= self.key(robot) and self.rhs.get(robot, INF) == self.g.get(robot, INF)):
+                return
+            new_key = self.key(cell)
+            if key < new_key:  # robot moved since it was pushed
+                self.push(cell)
+                continue
+            heapq.heappop(self.queue)
+            del self.queued[cell]
+            self.n_checked += 1
+            if self.g.get(cell, INF) > self.rhs[cell]:
+                self.g[cell] = self.rhs[cell]
+                for n in self.neighbours(cell):
+                    self.update_vertex(n)
+            else:
+                self.g[cell] = INF
+                for n in self.neighbours(cell) + [cell]:
+                    self.update_vertex(n)
+
+    def check(self, cell, name):
+        """
+        Validates a position.
+        Raise exception if cell is non-existent.
+
+        return: position ((int, int))
+        """
+        x, y = cell
+        if not (0 <= x < self.grid.shape[0] and 0 <= y < self.grid.shape[1]):
+            print("[Error] Invalid {0} position.".format(name), file=sys.stderr)
+            raise UserInputException
+        return (x, y)
+
+    def move(self, start):
+        """
+        Moves the robot (start position).
+        Raise exception if start position is non-existent or occupied,
+        the map is not changed then.
+
+        start: new robot position ([int, int])
+        """
+        if self.grid[self.check(start, "start")] == WALL:
+            print("[Error] Invalid start position.", file=sys.stderr)
+            raise UserInputException
+        if self.grid[self.robot] == START:
+            self.grid[self.robot] = EMPTY
+        self.nodes = []
+        self.coords = []
+        self.parents = []
+        self.start = list(start)
+        self.robot = tuple(self.starts[0])
+        self.km += abs(self.robot[0] - self.last[0]) + abs(self.robot[1] - self.last[1])
+        self.last = self.robot
+
+    def update_cells(self, cells, start=None):
+        """
+        Changes map cells and/or moves the robot, then repairs the route.
+        Raise exception if a cell or start position is non-existent, a code
+        is not EMPTY or WALL, or start is occupied; nothing is changed then.
+
+        cells: changes, code EMPTY or WALL ([(x, y, code), ...])
+        start: new robot position, None if it did not move ([int, int])
+
+        return: route, positions from robot to end ([[int, int], ...]), None if not found
+        """
+        cells = [self.check((x, y), "cell") + (code,) for x, y, code in cells]
+        if any(code not in (EMPTY, WALL) for _, _, code in cells):
+            print("[Error] Invalid cell code.", file=sys.stderr)
+            raise UserInputException
+        if start is not None:
+            self.move(start)
+        changed = []
+        for x, y, code in cells:
+            old = self.grid[x, y]
+            if code != WALL and old in (START, END):  # keep the marks of free cells
+                continue
+            self.grid[x, y] = code
+            if (old == WALL) != (code == WALL):
+                changed.append((x, y))
+        for cell in changed:
+            self.update_vertex(cell)
+            for n in self.neighbours(cell):
+                self.update_vertex(n)
+        self.compute()
+        return self.route()
+
+    def route(self):
+        """
+        Route from the robot to the nearest end, following the distances.
+
+        return: route, positions from robot to end ([[int, int], ...]), None if not found
+        """
+        cell = self.robot
+        if self.g.get(cell, INF) == INF:
+            return None
+        route = [list(cell)]
+        while cell not in self.goals:
+            cell = min(self.neighbours(cell), key=lambda n: self.cost(cell, n) + self.g.get(n, INF))
+            route.append(list(cell))
+        return route
+
+
+def main(filename, start, end, blocked):
+    """
+    Entering method. Creates the map, plans, blocks a cell and replans, printing the results.
+    Raise exception if map is invalid.
+
+    filename: map file name (str)
+    start: start point ([int, int])
+    end: end point ([int, int])
+    blocked: cell to block after planning, None to block the middle of the route ([int, int])
+    """
+
+    try:
+        t0 = time.time()
+        map = DStarLite(filename, start, end)
+        tf = time.time()
+    except UserInputException:
+        print("[Error] Exiting..", file=sys.stderr)
+        return -1
+
+    map.dump()
+    route = map.route()
+    print_results([len(route) - 1 if route else 0, map.n_checked, round((tf-t0), 5)])
+
+    if route is None or len(route) < 3:
+        return
+    if blocked is None:
+        blocked = route[len(route) // 2]
+    n_checked = map.n_checked
+    t0 = time.time()
+    route = map.update_cells([(blocked[0], blocked[1], WALL)], route[1])
+    tf = time.time()
+
+    map.dump()
+    print("Replanned after blocking {0} and moving one step:".format(blocked))
+    print_results([len(route) - 1 if route else 0, map.n_checked - n_checked, round((tf-t0), 5)])
+
+
+if __name__ == "__main__":
+    # Command line argument parser, try: python3 dstar.py -h
+    parser = argparse.ArgumentParser(description="D* Lite Algorithm (plans, blocks a cell and replans).")
+    parser.add_argument('-m', '--map', metavar='MAP', dest='map', default=MAP, help='change map folder')
+    parser.add_argument('-s', '--start', type=int, nargs=2, metavar='N', dest='start', default=[START_X, START_Y], help='change start point')
+    parser.add_argument('-e', '--end', type=int, nargs=2, metavar='N', dest='end', default=[END_X, END_Y], help='change end point')
+    parser.add_argument('-b', '--block', type=int, nargs=2, metavar='N', dest='block', default=None, help='cell to block (default: middle of the route)')
+    args = parser.parse_args()
+
+    main(FILE_NAME.format(args.map), args.start, args.end, args.block)
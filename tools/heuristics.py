@@ -0,0 +1,123 @@
+#! /usr/bin/env python
+
+"""Heuristics of the cost-based planners, precomputed for the whole grid.
+
+Each heuristic is computed once per map shape and goal(s) as a NumPy array
+of the estimated cost from every cell to the nearest goal, so planners look
+it up instead of computing distances per checked cell. Maps above
+FIELD_MAX_CELLS (or tiled ones) get a field computed per cell on access
+instead, and the zero heuristic never builds one. All of them are
+admissible and consistent on 4-connected maps of unit cost.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+__author__ = "Pedro Arias Perez"
+
+
+FIELD_MAX_CELLS = 1 << 22  # larger maps get a LazyField (a dense field would take 32 MB)
+FIELD_CACHE_BYTES = 64 * 1024 * 1024  # memory budget of the dense fields cache, two of the largest fields
+FIELD_CACHE = OrderedDict()  # (name, shape, goals) -> field, least recently used first
+
+
+def manhattan(dx, dy):
+    return dx + dy
+
+
+def euclidean(dx, dy):
+    return np.sqrt(dx * dx + dy * dy)
+
+
+def octile(dx, dy):
+    return np.maximum(dx, dy) + (np.sqrt(2) - 1) * np.minimum(dx, dy)
+
+
+def zero(dx, dy):
+    return np.zeros(np.broadcast(dx, dy).shape)
+
+
+# name -> distance from coordinate differences (np.ndarray, np.ndarray -> np.ndarray)
+HEURISTICS = {
+    "manhattan": manhattan,
+    "euclidean": euclidean,
+    "octile": octile,
+    "zero": zero,
+}
+
+
+class LazyField:
+    """
+    Heuristic field computed per cell on access, for maps too large (or too
+    lazily loaded) to hold one float per cell.
+    """
+
+    def __init__(self, name, goals):
+        self.distance = HEURISTICS[name]
+        self.goals = goals
+
+    def __getitem__(self, cell):
+        x, y = cell
+        return min((float(self.distance(abs(x - gx), abs(y - gy))) for gx, gy in self.goals), default=0.0)
+
+
+class ZeroField:
+    """
+    Zero heuristic field, no array needed.
+    """
+
+    def __getitem__(self, cell):
+        return 0.0
+
+
+def _field(name, shape, goals):
+    """
+    Dense field of heuristic name, cached; least recently used fields are
+    evicted to keep the cache under FIELD_CACHE_BYTES (8 bytes per cell).
+    The most recently used field is always kept.
+    """
+    key = (name, shape, goals)
+    field = FIELD_CACHE.pop(key, None)
+    if field is None:
+        field = _compute_field(name, shape, goals)
+    FIELD_CACHE[key] = field
+    size = sum(f.nbytes for f in FIELD_CACHE.values())
+    while size > FIELD_CACHE_BYTES and len(FIELD_CACHE) > 1:
+        size -= FIELD_CACHE.popitem(last=False)[1].nbytes
+    return field
+
+
+def _compute_field(name, shape, goals):
+    xs = np.arange(shape[0], dtype=np.float64)[:, None]
+    ys = np.arange(shape[1], dtype=np.float64)[None, :]
+    field = np.full(shape, np.inf) if goals else np.zeros(shape)
+    for x, y in goals:
+        np.minimum(field, HEURISTICS[name](np.abs(xs - x), np.abs(ys - y)), out=field)
+    field.setflags(write=False)
+    return field
+
+
+def heuristic_field(name, shape, goals, lazy=False):
+    """
+    Heuristic from every cell to the nearest goal, indexed by [x, y]. Dense
+    fields are cached per heuristic, shape and goals, up to FIELD_CACHE_BYTES.
+    Raise ValueError if name is not one of HEURISTICS.
+
+    name: heuristic, one of HEURISTICS (str)
+    shape: map shape ((int, int))
+    goals: goal positions ([[int, int], ...])
+    lazy: compute per cell on access even if the map is small, e.g. for tiled maps (bool)
+
+    return: estimated cost per cell, zero everywhere without goals: read-only
+        np.ndarray of float64, or ZeroField/LazyField for the zero heuristic
+        and for lazy or large maps
+    """
+    if name not in HEURISTICS:
+        raise ValueError("unknown heuristic: {0}".format(name))
+    if name == "zero":
+        return ZeroField()
+    goals = tuple((int(x), int(y)) for x, y in goals)
+    if lazy or shape[0] * shape[1] > FIELD_MAX_CELLS:
+        return LazyField(name, goals)
+    return _field(name, tuple(shape), goals)
@@ -0,0 +1,352 @@
+#! /usr/bin/env python
+
+"""Implementation of Hierarchical Path-Finding A* (HPA*, 4-connected grids).
+
+The map is split into square clusters. Entrances are placed on the free
+segments of the borders between neighbour clusters, and the distances between
+the entrances of each cluster are precomputed (abstract graph). A query links
+start and end to the entrances of their clusters, runs A* on the abstract
+graph and refines each abstract edge with a search inside one cluster, so
+long queries only explore a few nodes per cluster crossed. Routes are near
+optimal: they go through the entrances.
+"""
+
+import os
+import sys
+import argparse
+import time
+import heapq
+from itertools import count
+
+import numpy as np
+
+from tools.utils import UserInputException, CharMap, WALL, print_results
+
+__author__ = "Pedro Arias Perez"
+
+
+LOCAL_PATH = os.path.dirname(os.path.abspath(__file__))
+FILE_NAME = LOCAL_PATH + "/../{0}.csv"
+MAP = "map1"
+START_X = 2
+START_Y = 2
+END_X = 7
+END_Y = 7
+
+CLUSTER = 16  # cluster side (cells)
+SPLIT = 6  # border segments this long or longer get an entrance at each end, else one in the middle
+
+
+class Abstraction:
+    """
+    Abstract graph of a map: clusters, their entrances and the distances
+    between them. Built once per map, then answers any number of queries.
+    entrances: entrance cells of each cluster ({(int, int): {(int, int), ...}})
+    graph: neighbour entrances and distance of each entrance ({(int, int): {(int, int): int}})
+    """
+
+    def __init__(self, grid, cluster=CLUSTER):
+        self.free = np.asarray(grid) != WALL
+        self.shape = self.free.shape
+        self.cluster = cluster
+        self.entrances = {}
+        self.graph = {}
+
+        self.find_entrances()
+        for key, cells in self.entrances.items():
+            for cell in cells:
+                self.graph[cell].update(self.local_distances(key, cell, cells))
+
+    def cluster_of(self, cell):
+        """
+        Cluster of a cell ((int, int)).
+        """
+        return (cell[0] // self.cluster, cell[1] // self.cluster)
+
+    def bounds(self, key):
+        """
+        First and past the last row and column of a cluster ((int, int, int, int)).
+        """
+        x0, y0 = key[0] * self.cluster, key[1] * self.cluster
+        return x0, y0, min(x0 + self.cluster, self.shape[0]), min(y0 + self.cluster, self.shape[1])
+
+    def find_entrances(self):
+        """
+        Places the entrances along the cluster borders and links each one to
+        the entrance facing it (distance 1).
+        """
+        nrow, ncol = self.shape
+        for x in range(self.cluster, nrow, self.cluster):  # between rows x - 1 and x
+            both = self.free[x - 1] & self.free[x]
+            for y0 in range(0, ncol, self.cluster):
+                for y in entrance_offsets(both[y0:y0 + self.cluster]):
+                    self.connect((x - 1, y0 + y), (x, y0 + y))
+        for y in range(self.cluster, ncol, self.cluster):  # between columns y - 1 and y
+            both = self.free[:, y - 1] & self.free[:, y]
+            for x0 in range(0, nrow, self.cluster):
+                for x in entrance_offsets(both[x0:x0 + self.cluster]):
+                    self.connect((x0 + x, y - 1), (x0 + x, y))
+
+    def connect(self, a, b):
+        """
+        Adds an edge of distance 1 between two entrances of neighbour clusters.
+        """
+        for cell, other in ((a, b), (b, a)):
+            self.entrances.setdefault(self.cluster_of(cell), set()).add(cell)
+            self.graph.setdefault(cell, {})[other] = 1
+
+    def local_search(self, key, source):
+        """
+        Breadth First Search from source without leaving its cluster, over
+        the cluster cells padded with walls (cell index: (x - x0 + 1) * width + y - y0 + 1).
+
+        return: distance and parent index per cell, -1 if not reached ([int, ...], [int, ...]), width (int)
+        """
+        x0, y0, x1, y1 = self.bounds(key)
+        width = y1 - y0 + 2
+        free = np.pad(self.free[x0:x1, y0:y1], 1, constant_values=False).ravel().tolist()
+        offsets = (-width, width, 1, -1)
+
+        root = (source[0] - x0 + 1) * width + source[1] - y0 + 1
+        dist = [-1] * len(free)
+        parents = [-1] * len(free)
+        dist[root] = 0
+        queue = [root]
+        for i in queue:  # grows while iterated
+            d = dist[i] + 1
+            for offset in offsets:
+                n = i + offset
+                if free[n] and dist[n] < 0:
+                    dist[n] = d
+                    parents[n] = i
+                    queue.append(n)
+        return dist, parents, width
+
+    def local_distances(self, key, source, cells):
+        """
+        Distances inside a cluster from source to the reachable cells.
+
+        key: cluster ((int, int))
+        source: position ((int, int))
+        cells: positions in the cluster ([(int, int), ...])
+
+        return: distance to each reachable cell ({(int, int): int})
+        """
+        dist, _, width = self.local_search(key, source)
+        x0, y0 = self.bounds(key)[:2]
+        distances = {}
+        for cell in cells:
+            d = dist[(cell[0] - x0 + 1) * width + cell[1] - y0 + 1]
+            if d >= 0:
+                distances[cell] = d
+        return distances
+
+    def local_path(self, a, b):
+        """
+        Shortest path between two cells of the same cluster, without leaving it.
+
+        return: positions from a to b ([[int, int], ...])
+        """
+        key = self.cluster_of(a)
+        _, parents, width = self.local_search(key, a)
+        x0, y0 = self.bounds(key)[:2]
+        path = []
+        i = (b[0] - x0 + 1) * width + b[1] - y0 + 1
+        while i >= 0:
+            path.append([i // width - 1 + x0, i % width - 1 + y0])
+            i = parents[i]
+        path.reverse()
+        return path
+
+    def search(self, start, goal):
+        """
+        A* on the abstract graph, with start and goal linked to the entrances
+        of their clusters (and to each other if they share cluster).
+
+        start: start position ((int, int))
+        goal: goal position ((int, int))
+
+        return: waypoints from start to goal ([(int, int), ...]), None if not found; expanded nodes (int)
+        """
+        start_key, goal_key = self.cluster_of(start), self.cluster_of(goal)
+        targets = set(self.entrances.get(start_key, ()))
+        if start_key == goal_key:
+            targets.add(goal)
+        from_start = self.local_distances(start_key, start, targets)
+        to_goal = self.local_distances(goal_key, goal, self.entrances.get(goal_key, ()))
+
+        costs = {start: 0}
+        parents = {start: None}
+        closed = set()
+        counter = count()
+        opens = [(manhattan(start, goal), next(counter), start)]
+        while opens:
+            node = heapq.heappop(opens)[2]
+            if node in closed:  # stale entry
+                continue
+            if node == goal:
+                waypoints = []
+                while node is not None:
+                    waypoints.append(node)
+                    node = parents[node]
+                waypoints.reverse()
+                return waypoints, len(closed)
+            closed.add(node)
+            edges = self.graph.get(node, {})
+            if node == start or node in to_goal:
+                edges = dict(edges)
+                if node == start:
+                    edges.update(from_start)
+                if node in to_goal:
+                    edges[goal] = to_goal[node]
+            for neighbour, d in edges.items():
+                g = costs[node] + d
+                if neighbour not in closed and g < costs.get(neighbour, float('inf')):
+                    costs[neighbour] = g
+                    parents[neighbour] = node
+                    heapq.heappush(opens, (g + manhattan(neighbour, goal), next(counter), neighbour))
+        return None, len(closed)
+
+    def refine(self, waypoints, refine=True):
+        """
+        Turns abstract waypoints into a route of neighbour cells.
+
+        waypoints: abstract route ([(int, int), ...])
+        refine: True for the whole route, False for the abstract waypoints
+            only, or the number of first steps to refine (bool or int)
+
+        return: route, positions from start ([[int, int], ...])
+        """
+        if refine is False:
+            return [list(cell) for cell in waypoints]
+        steps = None if refine is True else refine
+        route = [list(waypoints[0])]
+        for a, b in zip(waypoints, waypoints[1:]):
+            if steps is not None and len(route) > steps:
+                break
+            if self.cluster_of(a) == self.cluster_of(b):
+                route.extend(self.local_path(a, b)[1:])
+            else:  # entrances facing each other
+                route.append(list(b))
+        return route if steps is None else route[:steps + 1]
+
+    def route(self, start, goal, refine=True):
+        """
+        Route from start to goal.
+        Raise exception if start or goal are non-existent or occupied.
+
+        start: start position ([int, int])
+        goal: goal position ([int, int])
+        refine: True for the whole route, False for the abstract waypoints
+            only, or the number of first steps to refine (bool or int)
+
+        return: route, positions from start ([[int, int], ...]), None if goal is unreachable
+        """
+        start = self.check(start, "start")
+        goal = self.check(goal, "end")
+        waypoints, _ = self.search(start, goal)
+        if waypoints is None:
+            return None
+        return self.refine(waypoints, refine)
+
+    def check(self, cell, name):
+        """
+        Validates a position.
+        Raise exception if cell is non-existent or occupied.
+
+        return: position ((int, int))
+        """
+        x, y = cell
+        if not (0 <= x < self.shape[0] and 0 <= y < self.shape[1]) or not self.free[x, y]:
+            print("[Error] Invalid {0} position.".format(name), file=sys.stderr)
+            raise UserInputException
+        return (x, y)
+
+
+def entrance_offsets(border):
+    """
+    Entrances along a cluster border: one in the middle of every free
+    segment, or one at each end if the segment is SPLIT cells or longer.
+
+    border: cells free on both sides (np.ndarray of bool)
+
+    return: offsets of the entrances along the border ([int, ...])
+    """
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], border.astype(np.int8), [0]))))
+    offsets = []
+    for a, b in zip(edges[::2].tolist(), edges[1::2].tolist()):
+        if b - a < SPLIT:
+            offsets.append((a + b - 1) // 2)
+        else:
+            offsets.extend((a, b - 1))
+    return offsets
+
+
+def manhattan(a, b):
+    """
+    Manhattan distance between two cells.
+    """
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+def hpa(map, abstraction=None, refine=True):
+    """
+    Executes Hierarchical Path-Finding A* Algorithm.
+    Counts abstract nodes expanded at map.n_checked.
+
+    map: Map where to find the path, with start and end (CharMap).
+    abstraction: abstract graph of the map, built if None (Abstraction).
+    refine: True for the whole route, False for the abstract waypoints only,
+        or the number of first steps to refine (bool or int).
+
+    return: route, positions from start ([[int, int], ...]), None if not found.
+    """
+    if abstraction is None:
+        abstraction = Abstraction(map.grid)
+    start, goal = tuple(map.start), tuple(map.end)
+    waypoints, expanded = abstraction.search(start, goal)
+    map.n_checked += expanded
+    if waypoints is None:
+        return None
+    return abstraction.refine(waypoints, refine)
+
+
+def main(filename, start, end, cluster):
+    """
+    Entering method. Creates the map, execs the algorithm and prints the result.
+    Raise exception if map is invalid.
+
+    filename: map file name (str)
+    start: start point ([int, int])
+    end: end point ([int, int])
+    cluster: cluster side (int)
+    """
+
+    try:
+        map = CharMap(filename, start, end)
+    except UserInputException:
+        print("[Error] Exiting..", file=sys.stderr)
+        return -1
+
+    map.dump()
+
+    t0 = time.time()
+    abstraction = Abstraction(map.grid, cluster)
+    t1 = time.time()
+    route = hpa(map, abstraction)
+    tf = time.time()
+
+    print("Abstract graph: {0} entrances, built in {1} s".format(len(abstraction.graph), round((t1-t0), 5)))
+    print_results([len(route) - 1 if route else 0, map.n_checked, round((tf-t1), 5)])
+
+
+if __name__ == "__main__":
+    # Command line argument parser, try: python3 hpa.py -h
+    parser = argparse.ArgumentParser(description="Hierarchical Path-Finding A* Algorithm.")
+    parser.add_argument('-m', '--map', metavar='MAP', dest='map', default=MAP, help='change map folder')
+    parser.add_argument('-s', '--start', type=int, nargs=2, metavar='N', dest='start', default=[START_X, START_Y], help='change start point')
+    parser.add_argument('-e', '--end', type=int, nargs=2, metavar='N', dest='end', default=[END_X, END_Y], help='change end point')
+    parser.add_argument('-c', '--cluster', type=int, metavar='N', dest='cluster', default=CLUSTER, help='change cluster side')
+    args = parser.parse_args()
+
+    main(FILE_NAME.format(args.map), args.start, args.end, args.cluster)
@@ -0,0 +1,213 @@
+#! /usr/bin/env python
+
+"""Implementation of Jump Point Search algorithm (4-connected grids).
+
+A* over jump points: straight moves are scanned ahead ("jumps") and only
+cells where the route may have to turn are added to the open nodes, so open
+rooms do not flood the frontier. Routes have the same length as Dijkstra's on
+uniform-cost maps.
+"""
+
+import os
+import sys
+import argparse
+import time
+import heapq
+from itertools import count
+
+import numpy as np
+
+from tools.utils import UserInputException, CharMap, WALL, print_results
+
+__author__ = "Pedro Arias Perez"
+
+
+LOCAL_PATH = os.path.dirname(os.path.abspath(__file__))
+FILE_NAME = LOCAL_PATH + "/../{0}.csv"
+MAP = "map1"
+START_X = 2
+START_Y = 2
+END_X = 7
+END_Y = 7
+
+
+class JumpGrid:
+    """
+    Walkable cells of a map as a flat byte string padded with walls, so that
+    jumps index cells directly without bound checks.
+    Cell index: (x + 1) * width + y + 1.
+    """
+
+    def __init__(self, grid, goal):
+        self.width = grid.shape[1] + 2
+        self.free = np.pad(np.asarray(grid) != WALL, 1, constant_values=False).tobytes()
+        self.goal = self.index(goal)
+
+    def index(self, cell):
+        return (cell[0] + 1) * self.width + cell[1] + 1
+
+    def cell(self, i):
+        return [i // self.width - 1, i % self.width - 1]
+
+    def jump_horizontal(self, i, d):
+        """
+        Scans a row from cell i moving d (+-1) until a jump point.
+
+        return: jump point index (int), -1 if a wall is reached
+        """
+        free, w = self.free, self.width
+        while free[i]:
+            if i == self.goal:
+                return i
+            if (free[i - w] and not free[i - w - d]) or (free[i + w] and not free[i + w - d]):
+                return i  # forced neighbour
+            i += d
+        return -1
+
+    def jump_vertical(self, i, d):
+        """
+        Scans a column from cell i moving d (+-width) until a jump point.
+        Cells with a horizontal jump point at their row are jump points too.
+
+        return: jump point index (int), -1 if a wall is reached
+        """
+        free = self.free
+        while free[i]:
+            if i == self.goal:
+                return i
+            if (free[i - 1] and not free[i - 1 - d]) or (free[i + 1] and not free[i + 1 - d]):
+                return i  # forced neighbour
+            if self.jump_horizontal(i + 1, 1) >= 0 or self.jump_horizontal(i - 1, -1) >= 0:
+                return i
+            i += d
+        return -1
+
+    def successors(self, i, parent):
+        """
+        Jump points reached from i, pruning the directions that a route
+        coming from parent does not need.
+
+        return: jump points indexes ([int, ...])
+        """
+        w = self.width
+        if parent is None:
+            directions = (-w, w, 1, -1)
+        elif i // w == parent // w:  # horizontal move
+            d = 1 if i > parent else -1
+            directions = (-w, w, d)
+        else:  # vertical move
+            d = w if i > parent else -w
+            directions = (-1, 1, d)
+
+        points = []
+        for d in directions:
+            if d in (1, -1):
+                j = self.jump_horizontal(i + d, d)
+            else:
+                j = self.jump_vertical(i + d, d)
+            if j >= 0:
+                points.append(j)
+        return points
+
+    def distance(self, i, j):
+        """
+        Manhattan distance between two cells.
+        """
+        w = self.width
+        return abs(i // w - j // w) + abs(i % w - j % w)
+
+
+def jps(map):
+    """
+    Executes Jump Point Search Algorithm.
+    Counts jump points added to the open nodes at map.n_checked.
+
+    map: Map where to find the path, with start and end (CharMap).
+
+    return: route, positions from start to end ([[int, int], ...]), None if not found.
+    """
+    grid = JumpGrid(map.grid, map.end)
+    start, goal = grid.index(map.start), grid.goal
+
+    costs = {start: 0}
+    parents = {start: None}
+    closed = set()
+    counter = count()
+    opens = [(grid.distance(start, goal), next(counter), start)]
+
+    while opens:
+        i = heapq.heappop(opens)[2]
+        if i in closed:  # stale entry
+            continue
+        if i == goal:
+            return expand(grid, parents, goal)
+        closed.add(i)
+        for j in grid.successors(i, parents[i]):
+            g = costs[i] + grid.distance(i, j)
+            if j not in closed and g < costs.get(j, float('inf')):
+                map.n_checked += 1
+                costs[j] = g
+                parents[j] = i
+                heapq.heappush(opens, (g + grid.distance(j, goal), next(counter), j))
+    return None
+
+
+def expand(grid, parents, goal):
+    """
+    Fills the straight segments between jump points.
+
+    grid: jump grid (JumpGrid)
+    parents: parent of each jump point ({int: int})
+    goal: goal index (int)
+
+    return: route, positions from start to goal ([[int, int], ...])
+    """
+    points = []
+    i = goal
+    while i is not None:
+        points.append(i)
+        i = parents[i]
+    points.reverse()
+
+    route = [grid.cell(points[0])]
+    for a, b in zip(points, points[1:]):
+        step = (1 if b > a else -1) * (1 if a // grid.width == b // grid.width else grid.width)
+        for i in range(a + step, b + step, step):
+            route.append(grid.cell(i))
+    return route
+
+
+def main(filename, start, end):
+    """
+    Entering method. Creates the map, execs the algorithm and prints the result.
+    Raise exception if map is invalid.
+
+    filename: map file name (str)
+    start: start point ([int, int])
+    end: end point ([int, int])
+    """
+
+    try:
+        map = CharMap(filename, start, end)
+    except UserInputException:
+        print("[Error] Exiting..", file=sys.stderr)
+        return -1
+
+    map.dump()
+
+    t0 = time.time()
+    route = jps(map)
+    tf = time.time()
+
+    print_results([len(route) - 1 if route else 0, map.n_checked, round((tf-t0), 5)])
+
+
+if __name__ == "__main__":
+    # Command line argument parser, try: python3 jps.py -h
+    parser = argparse.ArgumentParser(description="Jump Point Search Algorithm.")
+    parser.add_argument('-m', '--map', metavar='MAP', dest='map', default=MAP, help='change map folder')
+    parser.add_argument('-s', '--start', type=int, nargs=2, metavar='N', dest='start', default=[START_X, START_Y], help='change start point')
+    parser.add_argument('-e', '--end', type=int, nargs=2, metavar='N', dest='end', default=[END_X, END_Y], help='change end point')
+    args = parser.parse_args()
+
+    main(FILE_NAME.format(args.map), args.start, args.end)
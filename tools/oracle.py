@@ -0,0 +1,149 @@
+#! /usr/bin/env python
+
+"""Goal-rooted distance field (route oracle).
+
+A single reverse Breadth First Search from the goal gives the distance to the
+goal and the best move from every cell of the map, so routes to that goal are
+answered from any start in O(1) per step.
+"""
+
+import sys
+from collections import deque
+
+import numpy as np
+
+from tools.utils import UserInputException, WALL, as_cells
+
+__author__ = "Pedro Arias Perez"
+
+
+# up, down, right, left (same order as the planners)
+MOVES = np.array([[-1, 0], [1, 0], [0, 1], [0, -1]])
+
+
+class RouteOracle:
+    """
+    Distance field and best-move table of a goal (uniform cost, 4-connected).
+    Several goals may be given, routes then lead to the nearest one.
+    distances: steps to goal per cell, -1 if unreachable (np.ndarray of int32)
+    moves: index in MOVES of the best move per cell, -1 at goal or if unreachable (np.ndarray of int8)
+    """
+
+    def __init__(self, grid, goal):
+        self.grid = grid
+        self.shape = grid.shape
+        self.goals = [list(self.check(c, "end")) for c in as_cells(goal)]
+        self.distances = distance_field(grid, self.goals)
+        self.moves = best_moves(self.distances)
+
+    def check(self, cell, name):
+        """
+        Validates a position.
+        Raise exception if cell is non-existent or occupied.
+
+        return: position ((int, int))
+        """
+        x, y = cell
+        if not (0 <= x < self.shape[0] and 0 <= y < self.shape[1]) or self.grid[x, y] == WALL:
+            print("[Error] Invalid {0} position.".format(name), file=sys.stderr)
+            raise UserInputException
+        return (x, y)
+
+    def distance(self, state):
+        """
+        Steps from state to the nearest goal.
+        Raise exception if state is non-existent or occupied.
+
+        state: position ([int, int])
+
+        return: distance (int), -1 if goal is unreachable
+        """
+        x, y = self.check(state, "start")
+        return int(self.distances[x, y])
+
+    def next_move(self, state):
+        """
+        Next position from state towards the goal.
+        Raise exception if state is non-existent or occupied.
+
+        state: position ([int, int])
+
+        return: next position ([int, int]), None at goal or if goal is unreachable
+        """
+        x, y = self.check(state, "start")
+        move = self.moves[x, y]
+        if move < 0:
+            return None
+        return [x + int(MOVES[move][0]), y + int(MOVES[move][1])]
+
+    def route(self, start):
+        """
+        Route from start to goal. With several starts, from the nearest one.
+        Raise exception if a start is non-existent or occupied.
+
+        start: start position ([int, int]) or positions ([[int, int], ...])
+
+        return: route, positions from start to goal ([[int, int], ...]), None if goal is unreachable
+        """
+        reachable = [c for c in as_cells(start) if self.distance(c) >= 0]
+        if not reachable:
+            return None
+        x, y = min(reachable, key=self.distance)
+        route = [[x, y]]
+        move = self.moves[x, y]
+        while move >= 0:  # steps are inside the map, no checks needed
+            x, y = x + int(MOVES[move][0]), y + int(MOVES[move][1])
+            route.append([x, y])
+            move = self.moves[x, y]
+        return route
+
+
+def distance_field(grid, sources):
+    """
+    Breadth First Search from sources over the non-wall cells of grid.
+
+    grid: cell codes (np.ndarray)
+    sources: root positions ([[int, int], ...])
+
+    return: steps to the nearest source per cell, -1 if unreachable (np.ndarray of int32)
+    """
+    nrow, ncol = grid.shape
+    width = ncol + 2  # map is padded with walls, no bound checks needed
+    free = np.pad(np.asarray(grid) != WALL, 1, constant_values=False).ravel().tolist()
+    offsets = (-width, width, 1, -1)
+
+    dist = [-1] * len(free)
+    queue = deque()
+    for s in sources:
+        cell = (s[0] + 1) * width + s[1] + 1
+        if dist[cell] < 0:
+            dist[cell] = 0
+            queue.append(cell)
+    while queue:
+        cell = queue.popleft()
+        d = dist[cell] + 1
+        for offset in offsets:
+            n = cell + offset
+            if free[n] and dist[n] < 0:
+                dist[n] = d
+                queue.append(n)
+
+    return np.array(dist, dtype=np.int32).reshape(nrow + 2, width)[1:-1, 1:-1]
+
+
+def best_moves(distances):
+    """
+    Best move per cell of a distance field: first of MOVES that decreases the distance.
+
+    distances: distance field (np.ndarray of int32)
+
+    return: index in MOVES per cell, -1 at sources or unreachable cells (np.ndarray of int8)
+    """
+    padded = np.pad(distances, 1, constant_values=-1)
+    nrow, ncol = distances.shape
+    moves = np.full(distances.shape, -1, dtype=np.int8)
+    for i in reversed(range(len(MOVES))):  # first move wins
+        dx, dy = MOVES[i]
+        neighbour = padded[1 + dx:1 + dx + nrow, 1 + dy:1 + dy + ncol]
+        moves[(distances > 0) & (neighbour == distances - 1)] = i
+    return moves
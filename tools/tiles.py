@@ -0,0 +1,246 @@
+#! /usr/bin/env python
+
+"""Tiled maps, for worlds larger than memory.
+
+A tiled map is a directory holding index.json (map shape, tile side and fill
+code) and one .npy file (uint8 cell codes) per tile, named <row>_<col>.npy
+after the tile position. Tiles made only of the fill code are not stored, so
+large empty or walled areas cost nothing on disk.
+
+TiledGrid reads tiles on demand and keeps only the least recently used ones
+resident. It supports the cell access of planners, grid[x, y], so a CharMap
+loaded from a tiled map only loads the tiles its search frontier reaches.
+Try: python3 -m tools.tiles -h
+"""
+
+import os
+import sys
+import json
+import argparse
+from collections import OrderedDict
+
+import numpy as np
+
+__author__ = "Pedro Arias Perez"
+
+
+INDEX = "index.json"
+TILE = 256  # default tile side (cells)
+FILL = 1  # default code of the cells not stored (wall)
+MAX_TILES = 64  # default clean tiles kept in memory
+
+
+class TiledGrid:
+    """
+    2D grid of cell codes stored as square tiles, loaded on demand.
+    Clean tiles are evicted least recently used first when there are more
+    than max_tiles. Written tiles are private copies (as a copy-on-write
+    memory map) and stay resident, the files are never modified.
+    Without directory, the grid lives only in memory and tiles are created
+    when first written (used for the display flags of tiled maps).
+    """
+
+    ndim = 2
+
+    def __init__(self, directory=None, shape=None, tile=TILE, fill=FILL, dtype=np.uint8, max_tiles=MAX_TILES):
+        self.directory = directory
+        self.dtype = np.dtype(dtype)
+        self.max_tiles = max_tiles
+        if directory is not None:
+            with open(os.path.join(directory, INDEX)) as f:
+                index = json.load(f)
+            try:
+                shape, tile, fill = index["shape"], index["tile"], index["fill"]
+            except (KeyError, TypeError):
+                raise ValueError("invalid tiled map index: " + directory)
+        if len(shape) != 2 or tile < 1:
+            raise ValueError("map must be 2D with tiles of 1 cell or more")
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.tile = int(tile)
+        self.background = fill  # code of the cells not stored
+        self.tiles = OrderedDict()  # (row, col) -> clean tile, least recently used first
+        self.dirty = {}  # (row, col) -> written tile
+        self.n_loaded = 0  # tiles read from disk
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __array__(self, dtype=None, copy=None):
+        """
+        Whole grid as an array (for drawing or whole-map algorithms): loads
+        every tile, without keeping them resident.
+        """
+        grid = np.empty(self.shape, dtype=self.dtype if dtype is None else dtype)
+        for i in range(0, self.shape[0], self.tile):
+            for j in range(0, self.shape[1], self.tile):
+                key = (i // self.tile, j // self.tile)
+                tile = self.dirty.get(key)
+                if tile is None:
+                    tile = self.tiles.get(key)
+                if tile is None:
+                    tile = self.read_tile(key)
+                grid[i:i + self.tile, j:j + self.tile] = tile
+        return grid
+
+    def __getitem__(self, cell):
+        x, y = self.locate(cell)
+        return self.get_tile((x // self.tile, y // self.tile))[x % self.tile, y % self.tile]
+
+    def __setitem__(self, cell, code):
+        x, y = self.locate(cell)
+        self.get_tile((x // self.tile, y // self.tile), write=True)[x % self.tile, y % self.tile] = code
+
+    def locate(self, cell):
+        """
+        Position of a cell, negative indices count from the end (as NumPy).
+        Raise IndexError if cell is out of the grid.
+
+        cell: position ((int, int))
+
+        return: position ((int, int))
+        """
+        x, y = cell
+        nrow, ncol = self.shape
+        if x < 0:
+            x += nrow
+        if y < 0:
+            y += ncol
+        if not (0 <= x < nrow and 0 <= y < ncol):
+            raise IndexError("cell {0} out of grid {1}".format(cell, self.shape))
+        return int(x), int(y)
+
+    def tile_shape(self, key):
+        """
+        Shape of a tile, smaller than tile side at the last rows and columns.
+        """
+        return (min(self.tile, self.shape[0] - key[0] * self.tile),
+                min(self.tile, self.shape[1] - key[1] * self.tile))
+
+    def read_tile(self, key):
+        """
+        Reads a tile from disk, filled with the fill code if it is not stored.
+
+        key: tile position ((int, int))
+
+        return: tile (np.ndarray)
+        """
+        if self.directory is not None:
+            path = os.path.join(self.directory, "{0}_{1}.npy".format(*key))
+            if os.path.exists(path):
+                self.n_loaded += 1
+                tile = np.load(path)
+                if tile.shape != self.tile_shape(key):
+                    raise ValueError("invalid tile shape: " + path)
+                return tile.astype(self.dtype, copy=False)
+        return np.full(self.tile_shape(key), self.background, dtype=self.dtype)
+
+    def get_tile(self, key, write=False):
+        """
+        Resident tile, loaded if needed.
+
+        key: tile position ((int, int))
+        write: the tile will be written, so it is never evicted (bool)
+
+        return: tile (np.ndarray)
+        """
+        tile = self.dirty.get(key)
+        if tile is not None:
+            return tile
+        tile = self.tiles.pop(key, None)
+        if tile is None:
+            tile = self.read_tile(key)
+        if write:
+            self.dirty[key] = tile
+        else:
+            self.tiles[key] = tile
+            if len(self.tiles) > self.max_tiles:
+                self.tiles.popitem(last=False)
+        return tile
+
+    @property
+    def resident(self):
+        """
+        Number of tiles in memory.
+        """
+        return len(self.tiles) + len(self.dirty)
+
+    def copy(self):
+        """
+        New grid over the same tiles, with its own copy of the written ones.
+        """
+        grid = TiledGrid(None, self.shape, self.tile, self.background, self.dtype, self.max_tiles)
+        grid.directory = self.directory
+        grid.dirty = {key: tile.copy() for key, tile in self.dirty.items()}
+        return grid
+
+    def blank(self, dtype=bool, fill=False):
+        """
+        In-memory grid with the same shape and tiles, every cell set to fill.
+        """
+        return TiledGrid(None, self.shape, self.tile, fill, dtype, self.max_tiles)
+
+    def replace(self, old, new):
+        """
+        Sets the written cells with code old to code new (stored tiles are
+        never changed, so only the written ones are looked at).
+        """
+        for tile in self.dirty.values():
+            tile[tile == old] = new
+
+    def fill(self, code):
+        """
+        Sets every cell to code (as np.ndarray.fill), the grid is no longer
+        read from disk.
+        """
+        self.directory = None
+        self.background = code
+        self.tiles = OrderedDict()
+        self.dirty = {}
+
+
+def write_tiles(grid, directory, tile=TILE, fill=FILL):
+    """
+    Stores a map as a tiled map. Tiles made only of the fill code are skipped.
+
+    grid: cell codes, a memory-mapped binary map is read tile by tile (np.ndarray)
+    directory: tiled map directory, created if needed (str)
+    tile: tile side (int)
+    fill: code of the cells not stored (int)
+
+    return: number of tiles stored (int)
+    """
+    os.makedirs(directory, exist_ok=True)
+    nrow, ncol = grid.shape
+    stored = 0
+    for i in range(0, nrow, tile):
+        for j in range(0, ncol, tile):
+            block = np.ascontiguousarray(grid[i:i + tile, j:j + tile], dtype=np.uint8)
+            path = os.path.join(directory, "{0}_{1}.npy".format(i // tile, j // tile))
+            if (block == fill).all():
+                if os.path.exists(path):  # stale tile of a previous map
+                    os.remove(path)
+                continue
+            np.save(path, block)
+            stored += 1
+    with open(os.path.join(directory, INDEX), "w") as f:
+        json.dump({"shape": [nrow, ncol], "tile": tile, "fill": fill}, f)
+    return stored
+
+
+if __name__ == "__main__":
+    from tools.utils import UserInputException, read_grid
+
+    # Command line argument parser, try: python3 -m tools.tiles -h
+    parser = argparse.ArgumentParser(description="Converts maps (CSV or .npy) to tiled maps.")
+    parser.add_argument('map', help='map file')
+    parser.add_argument('-o', '--output', metavar='DIR', help='tiled map directory (same name with .tiles extension by default)')
+    parser.add_argument('-t', '--tile', type=int, default=TILE, help='tile side (default: {0})'.format(TILE))
+    parser.add_argument('-f', '--fill', type=int, default=FILL, help='code of the cells not stored (default: {0})'.format(FILL))
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.map)[0] + ".tiles"
+    try:
+        stored = write_tiles(read_grid(args.map), output, args.tile, args.fill)
+    except UserInputException:
+        sys.exit(1)
+    print("{0}: {1} tiles".format(output, stored))
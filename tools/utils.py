@@ -2,8 +2,15 @@
 
 """Utils for graph searching algorithms."""
 
+import os
 import sys
+import heapq
 from enum import Enum
+from itertools import count
+
+import numpy as np
+
+from tools.tiles import TiledGrid
 
 __author__ = "Pedro Arias Perez"
 
@@ -22,6 +29,13 @@ class Output(Enum):
 
 OUTPUT_MODE = Output.COLORED
 
+# Cell codes
+EMPTY = 0
+WALL = 1
+VISITED = 2
+START = 3
+END = 4
+
 
 class UserInputException(Exception):
     """Custom exception to raise when user usage error."""
@@ -56,6 +70,7 @@ class Colors:
 class CharMapCell:
     """
     Wrapper for chars that allows formatting at printing.
+    Only built as a view of a map cell when the map is dumped.
     """
 
     RESET = Colors.ESC + "[0m"
@@ -70,10 +85,10 @@ class CharMapCell:
     C_END = Colors.ESC + "[" + Colors.BLINK + ";" + Colors.BG_RED + "m"
 
 
-    def __init__(self, c):
+    def __init__(self, c, is_new=False, is_current=False):
         self.c = str(c)
-        self.is_current = False
-        self.is_new = True if self.c == "2" else False
+        self.is_current = is_current
+        self.is_new = is_new
 
     def __eq__(self, o):
         if isinstance(o, CharMap):
@@ -119,18 +134,163 @@ class CharMapCell:
             return ""
 
 
+def resolve_map(filename):
+    """
+    Binary map to use instead of a CSV one: a .npy file with the same name
+    which is not older than the CSV (see tools/csv2npy.py).
+
+    filename: path to map file (str).
+
+    return: path to the map file to read (str).
+    """
+    root, ext = os.path.splitext(filename)
+    if ext != ".csv":
+        return filename
+    binary = root + ".npy"
+    try:
+        if not os.path.exists(filename) or os.path.getmtime(binary) >= os.path.getmtime(filename):
+            return binary
+    except OSError:  # no binary map
+        pass
+    return filename
+
+
+def read_grid(filename, mmap_mode='r', resolve=True):
+    """
+    Parses a map file: CSV text or binary (.npy, 2D uint8 array), which is
+    memory-mapped instead of read. Tiled maps (directories, see tools/tiles.py)
+    are opened without reading any tile.
+    Raise exception if map file is not found or invalid.
+
+    filename: path to file (str).
+    mmap_mode: memory-map mode of binary maps, 'c' for copy-on-write (str).
+    resolve: read the binary map instead of the CSV one if there is any (bool).
+
+    return: cell codes (np.ndarray of uint8, TiledGrid for tiled maps)
+    """
+    if resolve:
+        filename = resolve_map(filename)
+    try:
+        if os.path.isdir(filename):
+            return TiledGrid(filename)
+        if filename.endswith(".npy"):
+            grid = np.load(filename, mmap_mode=mmap_mode)
+            if grid.dtype != np.uint8 or grid.ndim != 2:
+                raise ValueError("map must be a 2D uint8 array")
+            return grid
+        return np.loadtxt(filename, delimiter=',', dtype=np.uint8, ndmin=2)
+    except FileNotFoundError:
+        print("[Error] Map not found.", file=sys.stderr)
+        raise UserInputException
+    except ValueError:
+        print("[Error] Invalid map.", file=sys.stderr)
+        raise UserInputException
+
+
+class TerminalRenderer:
+    """
+    Draws maps on the terminal keeping the last frame drawn, so that next
+    frames only redraw the changed cells (cursor moves plus cell escapes, all
+    of them in a single write). The map is drawn at the top of the screen and
+    everything below it is cleared on every frame.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream  # sys.stdout if None
+        self.frame = None  # cell styles of last frame drawn
+        self.cells = {}  # style -> printable cell
+        self.mode = None  # output mode of cached cells
+
+    def styles(self, map):
+        """
+        Cell styles of map: code + 256 if new + 512 if current.
+
+        map: map to draw (CharMap)
+
+        return: styles (np.ndarray of uint16)
+        """
+        styles = np.asarray(map.grid).astype(np.uint16)
+        styles[np.asarray(map.is_new)] += 256
+        styles[np.asarray(map.is_current)] += 512
+        return styles
+
+    def lookup(self, styles):
+        """
+        Printable cells of styles, built with CharMapCell views only once per style.
+
+        styles: cell styles (np.ndarray)
+
+        return: printable cells, same shape as styles (np.ndarray of str)
+        """
+        if self.mode != OUTPUT_MODE:
+            self.cells = {}
+            self.mode = OUTPUT_MODE
+        keys, inverse = np.unique(styles, return_inverse=True)
+        for key in keys.tolist():
+            if key not in self.cells:
+                self.cells[key] = str(CharMapCell(key % 256, key & 256 != 0, key & 512 != 0))
+        table = np.array([self.cells[key] for key in keys.tolist()], dtype=object)
+        return table[inverse.reshape(styles.shape)]
+
+    def ansi(self, map):
+        """
+        Whole frame of map.
+
+        map: map to draw (CharMap)
+
+        return: frame, one line per row (str)
+        """
+        return "\n".join("".join(row) for row in self.lookup(self.styles(map)).tolist()) + "\n"
+
+    def draw(self, map):
+        """
+        Draws map, redrawing only the cells changed since the last frame.
+
+        map: map to draw (CharMap)
+        """
+        styles = self.styles(map)
+        if self.frame is None or self.frame.shape != styles.shape:
+            out = Colors.ESC + "[H" + Colors.ESC + "[2J" + self.ansi(map)
+        else:
+            rows, cols = np.nonzero(styles != self.frame)
+            cells = self.lookup(styles[rows, cols]).tolist()
+            out = []
+            last = None
+            for row, col, cell in zip(rows.tolist(), cols.tolist(), cells):
+                if last != (row, col - 1):  # cursor does not follow the last cell
+                    out.append(Colors.ESC + "[{0};{1}H".format(row + 1, col + 1))
+                out.append(cell)
+                last = (row, col)
+            out.append(Colors.ESC + "[{0};1H".format(styles.shape[0] + 1))
+            out = "".join(out)
+        self.frame = styles
+        stream = self.stream if self.stream is not None else sys.stdout
+        stream.write(out + Colors.ESC + "[J")
+        stream.flush()
+
+
 class CharMap:
     """
     A map that represents the C-Space.
+    Cell codes are stored at a uint8 grid, new and current flags at separate
+    boolean planes.
     """
 
-    def __init__(self, filename, start=None, end=None):
-        self.charMap = []
+    def __init__(self, filename, start=None, end=None, grid=None):
+        self.grid = None
         self.nodes = []
+        self.coords = []  # node positions, indexed by node id
+        self.parents = []  # node parent ids, indexed by node id
         self.n_checked = 0
+        self.goal_found = None  # end reached by the search
         self.aux = None
+        self.observer = None  # search tracing hooks (SearchObserver)
+        self.renderer = None  # live drawing (TerminalRenderer)
 
-        self.read(filename)
+        if grid is None:
+            self.read(filename)
+        else:
+            self.load(grid)
         self.start = start
         self.end = end
 
@@ -144,18 +304,21 @@ class CharMap:
         Start setter. Also adds start position as root in nodes tree.
         Raise exception if s position is non-existent or occupied.
 
-        s: start position ([int, int])
+        s: start position ([int, int]) or positions for a multi-source search ([[int, int], ...])
         """
-        if s is not None:
-            if self.charMap[s[0]][s[1]].c == "1":  # wall
-                print("[Error] Invalid start position.", file=sys.stderr)
-                raise UserInputException
+        self.starts = as_cells(s)
+        for c in self.starts:
             try:
-                self.charMap[s[0]][s[1]] = CharMapCell(3)
+                if self.grid[c[0], c[1]] == WALL:
+                    print("[Error] Invalid start position.", file=sys.stderr)
+                    raise UserInputException
+                self.grid[c[0], c[1]] = START
             except IndexError:
                 print("[Error] Invalid start position.", file=sys.stderr)
                 raise UserInputException
-            self.nodes.append(Node(s[0], s[1], 0, -2))
+            node = Node(c[0], c[1], len(self.parents), -2)
+            self.add_to_tree(node)
+            self.nodes.append(node)
         self.__start = s
 
     @property
@@ -168,14 +331,15 @@ class CharMap:
         End setter.
         Raise exception if e position is non-existent or occupied.
 
-        e: end position ([int, int])
+        e: end position ([int, int]) or positions for a nearest-goal search ([[int, int], ...])
         """
-        if e is not None:
-            if self.charMap[e[0]][e[1]].c in ["1", "3"]:  # wall or start
-                print("[Error] Invalid end position.", file=sys.stderr)
-                raise UserInputException
+        self.ends = as_cells(e)
+        for c in self.ends:
             try:
-                self.charMap[e[0]][e[1]] = CharMapCell(4)
+                if self.grid[c[0], c[1]] in (WALL, START):
+                    print("[Error] Invalid end position.", file=sys.stderr)
+                    raise UserInputException
+                self.grid[c[0], c[1]] = END
             except IndexError:
                 print("[Error] Invalid end position.", file=sys.stderr)
                 raise UserInputException
@@ -183,36 +347,60 @@ class CharMap:
 
     def read(self, filename):
         """
-        Reads map from file and save it at charMap attribute.
+        Reads map from file and save it at grid attribute.
         Raise exception if map file is not found.
 
         filename: path to file (str).
         """
-        try:
-            with open(filename) as f:
-                line = f.readline()
-                while line:
-                    charLine = line.strip().split(',')
-                    l = []
-                    for c in charLine:
-                        l.append(CharMapCell(c))
-                    self.charMap.append(l)
-                    line = f.readline()
-        except FileNotFoundError:
-            print("[Error] Map not found.", file=sys.stderr)
-            raise UserInputException
+        self.load(read_grid(filename, mmap_mode='c'), copy=False)
+
+    def load(self, grid, copy=True):
+        """
+        Saves an already parsed map at grid attribute. Maps memory-mapped
+        from binary files are mapped again copy-on-write instead of copied,
+        tiled maps get their own written tiles.
+
+        grid: cell codes (np.ndarray or TiledGrid)
+        copy: copy grid, else it is used as is (bool)
+        """
+        if not copy:
+            self.grid = grid
+        elif isinstance(grid, TiledGrid):
+            self.grid = grid.copy()
+        elif isinstance(grid, np.memmap) and grid.filename is not None and grid.flags.c_contiguous:
+            self.grid = np.memmap(grid.filename, dtype=np.uint8, mode='c', offset=grid.offset,
+                                  shape=grid.shape)
+        else:
+            self.grid = np.array(grid, dtype=np.uint8)
+        if isinstance(self.grid, TiledGrid):  # flag tiles only exist where set
+            self.is_new = self.grid.blank(bool)
+            self.is_current = self.grid.blank(bool)
+        else:
+            self.is_new = np.zeros(self.grid.shape, dtype=bool)
+            self.is_current = np.zeros(self.grid.shape, dtype=bool)
 
     def dump(self):
         """
         Prints map.
         """
 
-        for line in self.charMap:
-            l = ""
-            for char in line:
-                l += str(char)
-            print(l)
-        print()  # empty line behind map
+        print(self.render(mode='ansi'))  # empty line behind map
+
+    def render(self, mode='human'):
+        """
+        Draws map.
+        human: redraws on the terminal the cells changed since the last frame.
+        ansi: returns the whole frame.
+
+        mode: 'human' or 'ansi' (str)
+
+        return: frame (str) if mode is 'ansi'
+        """
+        if self.renderer is None:
+            self.renderer = TerminalRenderer()
+        if mode == 'ansi':
+            return self.renderer.ansi(self)
+        self.renderer.draw(self)
 
     def check(self, cell, node):
         """
@@ -225,46 +413,59 @@ class CharMap:
         """
 
         self.n_checked += 1
-        if( self.charMap[cell[0]][cell[1]] == '4' ):  # end
+        code = self.grid[cell[0], cell[1]]
+        if code == END:
+            self.goal_found = [cell[0], cell[1]]
             return node.myId
-        elif ( self.charMap[cell[0]][cell[1]] == '0' ):  # empty
-            newNode = Node(cell[0], cell[1], len(self.nodes), node.myId)
-            self.charMap[cell[0]][cell[1]] = CharMapCell(2)
+        elif code == EMPTY:
+            newNode = Node(cell[0], cell[1], len(self.parents), node.myId)
+            self.grid[cell[0], cell[1]] = VISITED
+            self.add_to_tree(newNode)
             self.nodes.append(newNode)
+            if self.observer is not None:
+                self.observer.on_push(self, newNode)
         return -1
 
+    def add_to_tree(self, node):
+        """
+        Saves node position and parent at the tree arrays (indexed by node id).
+
+        node: new node, its id must be the next free one (Node)
+        """
+        self.coords.append([node.x, node.y])
+        self.parents.append(node.parentId)
+
     def set_current(self, cell):
         """
         Set cell as current for displaying reasons.
         """
 
         if self.aux is not None:
-            self.charMap[self.aux[0]][self.aux[1]].is_current = False
+            self.is_current[self.aux[0], self.aux[1]] = False
         self.aux = cell
-        self.charMap[cell[0]][cell[1]].is_current = True
+        self.is_current[cell[0], cell[1]] = True
 
     def clear_news(self):
         """
         Set all cells as not news for displaying reasons.
         """
 
-        for row in self.charMap:
-            for c in row:
-                c.is_new = False
+        self.is_new.fill(False)
 
     def reset(self):
         """
         Set all cells as not visited, clear tree nodes and reser checked cells counter.
         """
         self.nodes = []
+        self.coords = []
+        self.parents = []
         self.start = self.start
         self.end = self.end
 
-        for row in self.charMap:
-            for c in row:
-                if c == "2":
-                    c.c = "0"
+        replace_cells(self.grid, VISITED, EMPTY)
+        self.is_new.fill(False)
         self.n_checked = 0
+        self.goal_found = None
 
 
 class Node:
@@ -286,29 +487,175 @@ class Node:
               str(self.myId), "| parentId", str(self.parentId))
 
 
-def get_route(nodes, goalParentId):
+class SearchObserver:
+    """
+    Search tracing hooks. Planners only call them when an observer is attached
+    to the map (map.observer), so quiet searches do not pay for tracing.
     """
-    Goes through the nodes tree to find the path found.
 
-    nodes: tree node ([*Node])
-    goalParentId: id of node which foun goal (int)
+    def on_expand(self, map, node):
+        """
+        Called before node neighbours are checked.
+        """
+        pass
 
-    return: route, list of nodes from start to goal ([*Node]).
+    def on_push(self, map, node):
+        """
+        Called when a new node is added to the open nodes.
+        """
+        pass
+
+    def on_close(self, map, node):
+        """
+        Called after node neighbours are checked (goal not found).
+        """
+        pass
+
+    def on_goal(self, map, node):
+        """
+        Called when node finds the goal.
+        """
+        pass
+
+
+class DumpObserver(SearchObserver):
+    """
+    Prints the search step by step: counters, expanded nodes and map.
+    With live=True the map is redrawn in place (CharMap.render) instead of
+    being printed again at every step.
+    """
+
+    def __init__(self, live=False):
+        self.live = live
+        self.news = []  # cells to unflag as new at next expansion
+
+    def on_expand(self, map, node):
+        print("--------------------- number of open nodes: ", len(map.nodes))
+        if hasattr(map, "closed_nodes"):
+            print("--------------------- number of closed nodes: ", len(map.closed_nodes))
+
+        map.set_current([node.x, node.y])
+        for cell in self.news:
+            map.is_new[cell] = False
+        self.news = []
+        node.dump()
+
+    def on_push(self, map, node):
+        map.is_new[node.x, node.y] = True
+        self.news.append((node.x, node.y))
+
+    def on_close(self, map, node):
+        self.show(map)
+
+    def on_goal(self, map, node):
+        self.show(map)
+
+    def show(self, map):
+        if self.live:
+            map.render()
+        else:
+            map.dump()
+
+
+def as_cells(c):
+    """
+    Normalizes one position or a list of positions.
+
+    c: position ([int, int]), positions ([[int, int], ...]) or None
+
+    return: positions ([[int, int], ...])
+    """
+    if c is None:
+        return []
+    if len(c) and isinstance(c[0], (list, tuple)):
+        return [list(cell) for cell in c]
+    return [list(c)]
+
+
+class OpenList:
+    """
+    Open nodes ordered by cost (binary heap with lazy deletion).
+    Ties are broken by the highest path cost g (the node nearest to the goal),
+    then by insertion order. Pushing a node for a cell which is already open
+    supersedes the old entry (decrease-key), that is skipped when popped.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.entries = {}  # (x, y) -> live node
+        self.counter = count()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries.values())
+
+    def append(self, node):
+        """
+        Pushes node into the open list.
+
+        node: node to push (NodeCost)
+        """
+        self.entries[(node.x, node.y)] = node
+        heapq.heappush(self.heap, (node.cost, -node.g, next(self.counter), node))
+
+    def get(self, cell):
+        """
+        Open node of a cell.
+
+        cell: position ([int, int])
+
+        return: live node (NodeCost), None if cell is not open
+        """
+        return self.entries.get((cell[0], cell[1]))
+
+    def pop(self):
+        """
+        Pops the open node with the lowest cost.
+        Raise IndexError if there are no open nodes.
+
+        return: cheapest node (NodeCost)
+        """
+        while self.heap:
+            node = heapq.heappop(self.heap)[-1]
+            if self.entries.get((node.x, node.y)) is node:
+                del self.entries[(node.x, node.y)]
+                return node
+        raise IndexError("pop from empty open list")
+
+
+def replace_cells(grid, old, new):
+    """
+    Sets the cells with code old to code new.
+
+    grid: cell codes (np.ndarray or TiledGrid)
+    old: code to replace (int)
+    new: new code (int)
+    """
+    if isinstance(grid, TiledGrid):
+        grid.replace(old, new)
+    else:
+        grid[grid == old] = new
+
+
+def get_route(map, goalParentId):
+    """
+    Walks back the tree from the node which found the goal to the root.
+
+    map: searched map, with tree arrays filled (CharMap)
+    goalParentId: id of node which found goal (int)
+
+    return: route, positions from start to goal parent ([[int, int], ...]).
     """
-    print("%%%%%%%%%%%%%%%%%%%")
     route = []
-    ok = False
-    while not ok:
-        for node in nodes:
-            if( node.myId == goalParentId ):
-                route.insert(0, node)
-                node.dump()
-                goalParentId = node.parentId
-                if( goalParentId == -2):
-                    print("%%%%%%%%%%%%%%%%%")
-                    ok = True
+    while goalParentId >= 0:
+        route.append(map.coords[goalParentId])
+        goalParentId = map.parents[goalParentId]
+    route.reverse()
     return route
 
+
 def print_results(results):
     """
     Prints the statistical results obtained with a certain format.